@@ -0,0 +1 @@
+# 使benchmarks目录成为Python包
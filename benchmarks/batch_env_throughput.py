@@ -0,0 +1,52 @@
+"""批量环境吞吐量测试
+
+用固定种子的随机合法动作驱动 BatchEnv，统计每秒放置的方块数和结束的局数：
+
+    python -m benchmarks.batch_env_throughput --envs 1024 --steps 200
+"""
+import argparse
+import time
+
+import numpy as np
+
+from config.rules import PIECE_POLICY
+from core.batch_env import BatchEnv
+from core.piece_source import POLICIES
+
+
+def random_actions(rng, action_mask):
+    """为每个棋盘均匀选择一个合法动作"""
+    weights = rng.random(action_mask.shape) * action_mask
+    return weights.argmax(axis=1)
+
+
+def run(num_envs, steps, seed, policy=PIECE_POLICY):
+    env = BatchEnv(num_envs, seed=seed, policy=policy)
+    rng = np.random.default_rng(seed)
+    obs = env.reset()
+    games = 0
+    start = time.perf_counter()
+    for _ in range(steps):
+        obs, rewards, dones, info = env.step(random_actions(rng, obs['action_mask']))
+        games += int(dones.sum())
+    elapsed = time.perf_counter() - start
+    return {'pieces': num_envs * steps, 'games': games, 'seconds': elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BatchEnv 批量模拟吞吐量")
+    parser.add_argument('--envs', type=int, default=1024, help="同时模拟的棋盘数")
+    parser.add_argument('--steps', type=int, default=200, help="推进的步数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--policy', choices=POLICIES, default=PIECE_POLICY, help="出块方式")
+    args = parser.parse_args()
+
+    result = run(args.envs, args.steps, args.seed, args.policy)
+    seconds = result['seconds']
+    print(f"{args.envs} 个棋盘 x {args.steps} 步, 结束 {result['games']} 局, 用时 {seconds:.3f} 秒")
+    print(f"方块/秒: {result['pieces'] / seconds:.0f}")
+    print(f"局/秒: {result['games'] / seconds:.1f}")
+
+
+if __name__ == '__main__':
+    main()
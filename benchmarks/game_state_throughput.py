@@ -0,0 +1,61 @@
+"""无界面模拟吞吐量测试
+
+用固定种子的随机动作驱动 GameState 连续进行多局游戏，统计每秒模拟的局数、
+逻辑帧数和落地方块数。不需要ursina和显示器：
+
+    python -m benchmarks.game_state_throughput --games 200 --seed 1
+"""
+import argparse
+import random
+import time
+
+from config.rules import PIECE_POLICY
+from core.game_state import GameState, ACTIONS
+from core.piece_source import POLICIES
+
+
+def play_game(state, rng, max_ticks):
+    """用随机动作玩完一局，返回推进的逻辑帧数"""
+    while not state.game_over and state.tick_count < max_ticks:
+        state.step(rng.choice(ACTIONS))
+    return state.tick_count
+
+
+def run(games, seed, max_ticks, policy=PIECE_POLICY):
+    rng = random.Random(seed)
+    state = GameState(seed=seed, policy=policy)
+    ticks = 0
+    pieces = 0
+    start = time.perf_counter()
+    for game in range(games):
+        state.reset(seed + game)
+        state.spawn()
+        ticks += play_game(state, rng, max_ticks)
+        pieces += state.pieces_placed
+    elapsed = time.perf_counter() - start
+    return {
+        'games': games,
+        'ticks': ticks,
+        'pieces': pieces,
+        'seconds': elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GameState 无界面模拟吞吐量")
+    parser.add_argument('--games', type=int, default=100, help="模拟的局数")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--policy', choices=POLICIES, default=PIECE_POLICY, help="出块方式")
+    parser.add_argument('--max-ticks', type=int, default=100000, help="每局最多推进的逻辑帧数")
+    args = parser.parse_args()
+
+    result = run(args.games, args.seed, args.max_ticks, args.policy)
+    seconds = result['seconds']
+    print(f"{result['games']} 局, {result['ticks']} 帧, {result['pieces']} 个方块, 用时 {seconds:.3f} 秒")
+    print(f"局/秒: {result['games'] / seconds:.1f}")
+    print(f"帧/秒: {result['ticks'] / seconds:.0f}")
+    print(f"方块/秒: {result['pieces'] / seconds:.0f}")
+
+
+if __name__ == '__main__':
+    main()
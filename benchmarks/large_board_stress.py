@@ -0,0 +1,140 @@
+"""大网格压力测试
+
+在 32×32×128（可调）的网格上不断放下方块直到堆满（每次在若干随机落点中选最低的，
+使棋盘均匀地填满而不是堆成几根高柱），逐个方块统计
+落地流程（落地、消层检查、生成下一个方块）、俯视图读取和受影响层网格重建的耗时，
+检查每个方块的处理时间是否都在一帧的时间预算之内：
+
+    python -m benchmarks.large_board_stress --width 32 --depth 32 --height 128
+
+网格重建只测量暴露面的生成（core.layer_faces，与界面中逐块重建的内容相同），
+不需要ursina。任何一项的99分位超过预算时以非零状态退出。
+"""
+import argparse
+import random
+import sys
+import time
+
+from core.game_state import GameState, create_board
+from core.layer_faces import build_layer_faces, chunk_mask, touched_chunks
+from core.rotation_table import ORIENTATIONS, BOTTOMS
+
+# 60帧/秒时一帧的时间（毫秒）
+FRAME_BUDGET_MS = 1000 / 60
+
+# 每个方块比较的随机落点数
+CANDIDATES = 16
+
+
+def random_placement(rng, state):
+    """随机选一个朝向和使方块完整落在界内的 (x, z)，不枚举全部落点"""
+    orientations = ORIENTATIONS[state.piece.shape_key]
+    orientation = rng.randrange(len(orientations))
+    xs = [dx for dx, _, _ in orientations[orientation]]
+    zs = [dz for _, _, dz in orientations[orientation]]
+    x = rng.randrange(-min(xs), state.width - max(xs))
+    z = rng.randrange(-min(zs), state.depth - max(zs))
+    return orientation, x, z
+
+
+def lowest_placement(rng, state):
+    """在若干随机落点中选落地后最低的"""
+    piece = state.piece
+    oy = piece.origin[1]
+    bottoms = BOTTOMS[piece.shape_key]
+    best = None
+    best_height = None
+    for _ in range(CANDIDATES):
+        placement = random_placement(rng, state)
+        orientation, x, z = placement
+        if not state.board.fits((x, oy, z), ORIENTATIONS[piece.shape_key][orientation]):
+            continue
+        height = oy - state.board.drop_distance((x, oy, z), bottoms[orientation])
+        if best_height is None or height < best_height:
+            best = placement
+            best_height = height
+    return best
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def run(width, depth, height, seed, backend):
+    rng = random.Random(seed)
+    state = GameState(width, height, depth, seed=seed,
+                      board=create_board(width, depth, height, backend), record_events=True)
+    palette = {key: (1, 1, 1, 1) for key in ORIENTATIONS}
+    timings = {'lock': [], 'views': [], 'mesh': []}
+    chunk_masks = {}
+
+    state.spawn()
+    state.pop_events()
+    failures = 0
+    start = time.perf_counter()
+    while not state.game_over:
+        placement = lowest_placement(rng, state)
+        if placement is None:
+            # 随机落点都被挡住，连续多次放不下时视为已经堆满
+            failures += 1
+            if failures > 100:
+                break
+            continue
+        failures = 0
+        t0 = time.perf_counter()
+        state.place(*placement)
+        t1 = time.perf_counter()
+        timings['lock'].append((t1 - t0) * 1000)
+
+        t0 = time.perf_counter()
+        state.board.top_cells()
+        timings['views'].append((time.perf_counter() - t0) * 1000)
+
+        # 与界面相同：只重建落地格子周围受影响的分块
+        events = state.pop_events()
+        touched = set()
+        for event in events:
+            if event[0] == 'locked':
+                touched |= touched_chunks(event[2], width, depth)
+        t0 = time.perf_counter()
+        for y, chunk in touched:
+            if chunk not in chunk_masks:
+                chunk_masks[chunk] = chunk_mask(width, depth, chunk)
+            build_layer_faces(state.board, y, palette, chunk_masks[chunk])
+        timings['mesh'].append((time.perf_counter() - t0) * 1000)
+
+    return state, timings, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="大网格压力测试")
+    parser.add_argument('--width', type=int, default=32)
+    parser.add_argument('--depth', type=int, default=32)
+    parser.add_argument('--height', type=int, default=128)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backend', choices=['bitboard', 'numpy'], default='bitboard')
+    parser.add_argument('--budget-ms', type=float, default=FRAME_BUDGET_MS,
+                        help="每个方块处理时间的预算（毫秒），默认一帧")
+    args = parser.parse_args()
+
+    state, timings, elapsed = run(args.width, args.depth, args.height, args.seed, args.backend)
+    cells = len(state.board)
+    capacity = args.width * args.depth * args.height
+    print(f"{args.width}×{args.depth}×{args.height}: {state.pieces_placed} 个方块, "
+          f"{state.lines_cleared} 层消除, 最终 {cells} 格 ({cells / capacity:.0%}), 用时 {elapsed:.2f} 秒")
+
+    over_budget = False
+    for name, values in timings.items():
+        p50, p99 = percentile(values, 50), percentile(values, 99)
+        flag = ''
+        if p99 > args.budget_ms:
+            flag = '  超出预算'
+            over_budget = True
+        print(f"{name:<6} p50 {p50:8.3f} ms  p99 {p99:8.3f} ms  最大 {max(values):8.3f} ms{flag}")
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
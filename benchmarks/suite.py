@@ -0,0 +1,444 @@
+"""核心操作基准测试套件
+
+在不同尺寸（4×4×25 到 32×32×128）和填充率的固定种子棋盘上，测量游戏核心操作
+每次调用的耗时和内存分配，结果保存为 JSON，可以和之前保存的基准结果比较：
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --compare baseline.json --threshold 0.2
+
+比较模式下任何一项指标比基准变差超过阈值时以非零状态退出，可以直接放进 CI。
+每项操作先预热，再重复测量 --repeats 轮，耗时按各轮中位数的最小值比较；
+各轮测量轮流进行，基准或本次结果中各轮相差超过阈值的耗时不稳定，只报告不参与判断。
+只依赖无界面的 GameState 和棋盘后端，不需要ursina和显示器。
+
+测量的操作（括号内为原来ursina实现中对应的函数）：
+    collision      棋盘碰撞检测 board.fits（check_collision）
+    ghost          直接下落距离 GameState.drop_distance（update_ghost_position）
+    lock_to_spawn  方块落地、消层检查到生成下一个方块 GameState.lock（land）
+    check_lines    消除一个满层 GameState.check_lines
+    views          俯视图读取每列最高方块 board.top_cells（update_views）
+
+耗时取各轮中位数的最小值、中位数和全部采样的95分位，已扣除计时本身的开销；
+内存分配用 tracemalloc 统计每次调用期间的峰值分配字节数，单独测量，不影响耗时结果。
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from core.game_state import GameState, Piece, create_board
+from core.rotation_table import ORIENTATIONS
+
+# 棋盘尺寸 (width, depth, height)，height 是生成高度
+SIZES = [(4, 4, 25), (8, 8, 32), (16, 16, 64), (32, 32, 128)]
+
+# 填充率：生成高度以下被方块堆叠的层数比例
+FILLS = [0.1, 0.4, 0.7]
+
+# 堆叠层中每格有方块的概率，每层至少留一个空格，不会出现满层
+CELL_DENSITY = 0.85
+
+# 每项操作的采样次数 {操作: 次数}
+SAMPLES = {
+    'collision': 2000,
+    'ghost': 2000,
+    'lock_to_spawn': 300,
+    'check_lines': 100,
+    'views': 200,
+}
+
+# 正式测量前预热的次数占采样次数的比例
+WARMUP_FRACTION = 0.2
+
+# 默认的重复测量轮数
+REPEATS = 5
+
+# 内存分配的采样次数
+ALLOC_SAMPLES = 20
+
+# 参与比较的指标
+TRACKED_METRICS = ('min_ns', 'alloc_bytes')
+
+# 分配字节数的比较容差，避免很小的数值因为对象池等原因产生误报
+ALLOC_SLACK = 256
+
+# 耗时的比较容差（纳秒），几十纳秒的操作受计时精度影响
+TIME_SLACK_NS = 50
+
+SHAPE_KEYS = list(ORIENTATIONS)
+
+
+def random_pose(rng, width, depth):
+    """随机选一个形状和朝向，以及使方块完整落在界内的 (x, z)
+
+    Returns:
+        tuple: (shape_key, orientation, x, z)
+    """
+    shape_key = rng.choice(SHAPE_KEYS)
+    orientation = rng.randrange(len(ORIENTATIONS[shape_key]))
+    offsets = ORIENTATIONS[shape_key][orientation]
+    xs = [dx for dx, _, _ in offsets]
+    zs = [dz for _, _, dz in offsets]
+    x = rng.randrange(-min(xs), width - max(xs))
+    z = rng.randrange(-min(zs), depth - max(zs))
+    return shape_key, orientation, x, z
+
+
+def fill_layer(board, rng, y, density=CELL_DENSITY):
+    """按概率填充一层，至少留一个空格"""
+    width, depth = board.width, board.depth
+    cells = [(x, z) for x in range(width) for z in range(depth) if rng.random() < density]
+    if len(cells) == width * depth:
+        cells.pop(rng.randrange(len(cells)))
+    for x, z in cells:
+        board[(x, y, z)] = rng.choice(SHAPE_KEYS)
+
+
+def build_state(width, depth, height, fill, backend, seed):
+    """创建堆叠了 fill 比例层数的固定种子棋盘
+
+    Returns:
+        tuple: (GameState, 堆叠层数)
+    """
+    rng = random.Random(seed)
+    board = create_board(width, depth, height, backend)
+    state = GameState(width, height, depth, seed=seed, board=board)
+    stack = int(height * fill)
+    for y in range(stack):
+        fill_layer(board, rng, y)
+    return state, stack
+
+
+def snapshot_layers(board, layers):
+    """保存若干层的全部格子 {(x, y, z): 形状键}"""
+    cells = {}
+    for y in layers:
+        for x in range(board.width):
+            for z in range(board.depth):
+                value = board.get((x, y, z))
+                if value is not None:
+                    cells[(x, y, z)] = value
+    return cells
+
+
+def restore_layers(board, layers, cells):
+    """把若干层恢复为 snapshot_layers 保存的内容"""
+    for y in layers:
+        for x in range(board.width):
+            for z in range(board.depth):
+                pos = (x, y, z)
+                if pos in cells:
+                    board[pos] = cells[pos]
+                elif pos in board:
+                    del board[pos]
+
+
+def measure(prepare, finish, samples, overhead=0):
+    """逐次计时：prepare 不计时地准备一次调用，finish 不计时地处理调用结果
+
+    与 timeit 相同，测量期间关闭垃圾回收，避免回收的停顿落在某一次调用上。
+
+    Returns:
+        list: 每次调用的耗时（纳秒）
+    """
+    timings = []
+    clock = time.perf_counter_ns
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(samples):
+            call = prepare()
+            start = clock()
+            result = call()
+            elapsed = clock() - start
+            finish(result)
+            timings.append(max(0, elapsed - overhead))
+    finally:
+        if enabled:
+            gc.enable()
+    return timings
+
+
+def measure_allocations(prepare, finish, samples):
+    """每次调用期间的峰值分配字节数的平均值"""
+    total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            call = prepare()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = call()
+            peak = tracemalloc.get_traced_memory()[1]
+            finish(result)
+            total += peak - before
+    finally:
+        tracemalloc.stop()
+    return total / samples
+
+
+def timer_overhead(samples=5000):
+    """空调用的计时开销（纳秒），从每次测量中扣除"""
+    timings = measure(lambda: int, lambda result: None, samples)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def operations(state, stack, rng):
+    """构造各项操作的 {名称: (prepare, finish)}
+
+    会修改棋盘的操作在 finish 中把棋盘恢复到原来的填充程度。
+    """
+    board = state.board
+    width, depth, height = state.width, state.depth, state.height
+    ignore = lambda result: None  # noqa: E731
+    pending = {}  # 正在测量的落地操作的格子、消层数和受影响的层
+
+    def collision():
+        # 在堆叠区域内随机检测，既有放得下的也有重叠的
+        shape_key, orientation, x, z = random_pose(rng, width, depth)
+        origin = (x, rng.randrange(stack + 2), z)
+        offsets = ORIENTATIONS[shape_key][orientation]
+        return lambda: board.fits(origin, offsets)
+
+    def ghost():
+        shape_key, orientation, x, z = random_pose(rng, width, depth)
+        state.piece = Piece(shape_key, (x, height, z), orientation)
+        return state.drop_distance
+
+    def lock():
+        shape_key, orientation, x, z = random_pose(rng, width, depth)
+        piece = Piece(shape_key, (x, height, z), orientation)
+        state.piece = piece
+        piece.origin = (x, height - state.drop_distance(), z)
+        cells = piece.cells()
+        pending['cells'] = cells
+        pending['lines'] = state.lines_cleared
+        # 消层只会改变方块最低一层到堆叠顶部之间的层，先保存下来
+        ys = [y for _, y, _ in cells]
+        pending['layers'] = range(min(ys), max(stack, max(ys) + 1))
+        pending['snapshot'] = snapshot_layers(board, pending['layers'])
+        return state.lock
+
+    def unlock(result):
+        state.piece = None
+        state.game_over = False
+        if state.lines_cleared != pending['lines']:
+            restore_layers(board, pending['layers'], pending['snapshot'])
+        else:
+            for cell in pending['cells']:
+                del board[cell]
+
+    def clear():
+        y = rng.randrange(stack)
+        for x in range(width):
+            for z in range(depth):
+                if (x, y, z) not in board:
+                    board[(x, y, z)] = rng.choice(SHAPE_KEYS)
+        return lambda: state.check_lines({y})
+
+    def refill(result):
+        # 消除的层由顶部重新补上
+        fill_layer(board, rng, stack - 1)
+
+    ops = {
+        'collision': (collision, ignore),
+        'ghost': (ghost, ignore),
+        'lock_to_spawn': (lock, unlock),
+        'views': (lambda: board.top_cells, ignore),
+    }
+    if stack:
+        ops['check_lines'] = (clear, refill)
+    return ops
+
+
+def summarize(rounds):
+    """汇总各轮的耗时
+
+    Args:
+        rounds: 每轮测量的耗时列表
+
+    Returns:
+        dict: min_ns/median_ns 为各轮中位数的最小值和中位数，p95_ns 取全部采样，
+              spread 为各轮中位数的中位数相对最小值多出的比例，个别一轮变慢不影响
+    """
+    medians = sorted(sorted(timings)[len(timings) // 2] for timings in rounds)
+    timings = sorted(t for timings in rounds for t in timings)
+    return {
+        'min_ns': medians[0],
+        'median_ns': medians[len(medians) // 2],
+        'p95_ns': timings[int(len(timings) * 0.95)],
+        'spread': round(medians[len(medians) // 2] / max(medians[0], 1) - 1, 3),
+    }
+
+
+class Case:
+    """一种棋盘配置：固定种子的棋盘和各项操作，各轮测量的耗时累积在 rounds 中"""
+
+    def __init__(self, width, depth, height, fill, backend, seed, scale):
+        state, stack = build_state(width, depth, height, fill, backend, seed)
+        self.ops = operations(state, stack, random.Random(seed))
+        self.samples = {name: max(10, int(SAMPLES[name] * scale)) for name in self.ops}
+        self.rounds = {name: [] for name in self.ops}
+
+    def measure_round(self, overhead, warmup=False):
+        """每项操作测量一轮；warmup 为True时先预热"""
+        for name, (prepare, finish) in self.ops.items():
+            samples = self.samples[name]
+            if warmup:
+                measure(prepare, finish, max(1, int(samples * WARMUP_FRACTION)), overhead)
+            self.rounds[name].append(measure(prepare, finish, samples, overhead))
+
+    def results(self):
+        results = {}
+        for name, (prepare, finish) in self.ops.items():
+            metrics = summarize(self.rounds[name])
+            metrics['alloc_bytes'] = round(measure_allocations(prepare, finish, ALLOC_SAMPLES), 1)
+            metrics['samples'] = self.samples[name]
+            metrics['repeats'] = len(self.rounds[name])
+            results[name] = metrics
+        return results
+
+
+def case_name(backend, width, depth, height, fill):
+    return f"{backend}/{width}x{depth}x{height}/fill{fill:.2f}"
+
+
+def run(backends, sizes, fills, seed, scale, repeats=REPEATS):
+    """测量所有配置
+
+    各轮测量轮流进行：每一轮依次测量所有配置，而不是连续测完一项再测下一项，
+    机器短时间变慢只会影响各项的某一轮，取各轮的最小值即可排除。
+    """
+    overhead = timer_overhead()
+    cases = {}
+    for backend in backends:
+        for width, depth, height in sizes:
+            for fill in fills:
+                name = case_name(backend, width, depth, height, fill)
+                cases[name] = Case(width, depth, height, fill, backend, seed, scale)
+    for repeat in range(repeats):
+        start = time.perf_counter()
+        for case in cases.values():
+            case.measure_round(overhead, warmup=repeat == 0)
+        print(f"第 {repeat + 1}/{repeats} 轮: {time.perf_counter() - start:.2f} 秒", file=sys.stderr)
+    cases = {name: case.results() for name, case in cases.items()}
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'seed': seed,
+            'scale': scale,
+            'repeats': repeats,
+            'timer_overhead_ns': overhead,
+        },
+        'cases': cases,
+    }
+
+
+def print_report(report):
+    print(f"{'配置':<32}{'操作':<15}{'最小(ns)':>12}{'中位数(ns)':>12}{'p95(ns)':>12}"
+          f"{'波动':>8}{'分配(B)':>10}")
+    for name, operations_ in report['cases'].items():
+        for op, metrics in operations_.items():
+            print(f"{name:<32}{op:<15}{metrics['min_ns']:>12}{metrics['median_ns']:>12}"
+                  f"{metrics['p95_ns']:>12}{metrics['spread']:>8.0%}{metrics['alloc_bytes']:>10.0f}")
+
+
+def compare(report, baseline, threshold):
+    """和基准结果比较
+
+    耗时只在基准和本次结果都稳定（各轮之间相差不超过阈值）时比较，并且各轮的
+    最小值和中位数都变差超过阈值才算变差；分配字节数是确定的，总是比较。
+
+    Returns:
+        tuple: (变差超过阈值的 [(配置, 操作, 指标, 基准值, 当前值), ...],
+                因为不稳定没有比较的 [(配置, 操作), ...])
+    """
+    regressions = []
+    unstable = []
+    for name, operations_ in report['cases'].items():
+        base_operations = baseline.get('cases', {}).get(name)
+        if base_operations is None:
+            continue
+        for op, metrics in operations_.items():
+            base = base_operations.get(op)
+            if base is None:
+                continue
+            for metric in TRACKED_METRICS:
+                if metric not in base:
+                    continue
+                if metric == 'alloc_bytes':
+                    worse = metrics[metric] > base[metric] * (1 + threshold) + ALLOC_SLACK
+                elif max(base.get('spread', 0), metrics['spread']) > threshold:
+                    unstable.append((name, op))
+                    continue
+                else:
+                    worse = all(metrics[key] > base[key] * (1 + threshold) + TIME_SLACK_NS
+                                for key in (metric, 'median_ns'))
+                if worse:
+                    regressions.append((name, op, metric, base[metric], metrics[metric]))
+    return regressions, unstable
+
+
+def parse_size(text):
+    width, depth, height = (int(part) for part in text.lower().split('x'))
+    return width, depth, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description="核心操作基准测试套件")
+    parser.add_argument('--backend', action='append', choices=['bitboard', 'numpy'],
+                        help="棋盘后端，可重复指定，默认全部可用的后端")
+    parser.add_argument('--size', action='append', type=parse_size,
+                        help="棋盘尺寸 WxDxH，可重复指定，默认 4x4x25 到 32x32x128")
+    parser.add_argument('--fill', action='append', type=float, help="填充率，可重复指定")
+    parser.add_argument('--seed', type=int, default=0, help="棋盘和方块的随机种子")
+    parser.add_argument('--quick', action='store_true', help="采样次数减少为十分之一")
+    parser.add_argument('--repeats', type=int, default=REPEATS,
+                        help=f"每项操作重复测量的轮数，默认{REPEATS}")
+    parser.add_argument('--output', help="把结果保存为 JSON 文件")
+    parser.add_argument('--compare', help="与之前保存的基准结果（JSON）比较")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="允许的变差比例，超过时以非零状态退出，默认0.25")
+    args = parser.parse_args()
+
+    backends = args.backend
+    if backends is None:
+        backends = ['bitboard']
+        try:
+            import numpy  # noqa: F401
+            backends.append('numpy')
+        except ImportError:  # numpy 为可选依赖
+            pass
+
+    report = run(backends, args.size or SIZES, args.fill or FILLS, args.seed,
+                 0.1 if args.quick else 1.0, args.repeats)
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions, unstable = compare(report, baseline, args.threshold)
+        for name, op in unstable:
+            print(f"不稳定，未比较耗时: {name} {op}")
+        for name, op, metric, before, after in regressions:
+            print(f"变差: {name} {op} {metric}: {before} -> {after}")
+        if regressions:
+            print(f"{len(regressions)} 项指标变差超过 {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"没有指标变差超过 {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
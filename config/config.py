@@ -1,37 +1,7 @@
 from ursina import *
 
-# 网格尺寸
-GRID_WIDTH = 4
-GRID_HEIGHT = 25
-GRID_DEPTH = 4
-
-# 调试选项
-DEBUG_MODE = True  # 设置为True启用更多的调试输出
-
-# 3D方块形状定义
-shapes = {
-    'T': [
-        [[0,0,0], [1,0,0], [-1,0,0], [0,1,0]],  # T形
-    ],
-    'J': [
-        [[0,0,0], [-1,0,0], [1,0,0], [1,1,0]],  # J形
-    ],
-    'L': [
-        [[0,0,0], [-1,0,0], [1,0,0], [-1,1,0]],  # L形
-    ],
-    'I': [
-        [[0,0,0], [0,1,0], [0,2,0], [0,-1,0]],  # I形
-    ],
-    'O': [
-        [[0,0,0], [1,0,0], [0,1,0], [1,1,0]],  # O形
-    ],
-    'S': [
-        [[0,0,0], [-1,0,0], [0,1,0], [1,1,0]],  # S形
-    ],
-    'Z': [
-        [[0,0,0], [1,0,0], [0,1,0], [-1,1,0]],  # Z形
-    ]
-}
+# 网格尺寸、存储后端和方块形状定义在rules中，这里统一导出
+from config.rules import *
 
 # 颜色定义
 shape_colors = {
@@ -44,6 +14,12 @@ shape_colors = {
     'Z': color.red
 }
 
+# 已落地方块的暗色调色板（亮度0.7），每种形状只创建一次
+landed_shape_colors = {
+    key: Color(c.r * 0.7, c.g * 0.7, c.b * 0.7, 1)
+    for key, c in shape_colors.items()
+}
+
 # 自定义颜色
 color.black66 = Color(0, 0, 0, 0.66)
 color.black50 = Color(0, 0, 0, 0.5)
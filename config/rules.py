@@ -0,0 +1,67 @@
+# 游戏规则参数：网格尺寸和方块形状，不依赖ursina，无界面模拟也可以直接导入
+
+# 网格尺寸，启动时可以用 configure_grid 修改
+GRID_WIDTH = 4
+GRID_HEIGHT = 25
+GRID_DEPTH = 4
+
+# 网格尺寸的允许范围：宽和深至少能放下最长的I形方块，高度还要留出生成空间
+MIN_GRID_SIZE = 4
+MIN_GRID_HEIGHT = 8
+MAX_GRID_SIZE = 64
+MAX_GRID_HEIGHT = 256
+
+# 棋盘存储后端: 'bitboard'（按层位掩码）或 'numpy'（体素数组，需要安装numpy）
+BOARD_BACKEND = 'bitboard'
+
+# 出块方式: 'uniform'（每次均匀随机）或 'bag'（7种形状一袋打乱后依次发出）
+PIECE_POLICY = 'uniform'
+
+# 调试选项
+DEBUG_MODE = True  # 设置为True启用更多的调试输出
+
+# 3D方块形状定义
+shapes = {
+    'T': [
+        [[0,0,0], [1,0,0], [-1,0,0], [0,1,0]],  # T形
+    ],
+    'J': [
+        [[0,0,0], [-1,0,0], [1,0,0], [1,1,0]],  # J形
+    ],
+    'L': [
+        [[0,0,0], [-1,0,0], [1,0,0], [-1,1,0]],  # L形
+    ],
+    'I': [
+        [[0,0,0], [0,1,0], [0,2,0], [0,-1,0]],  # I形
+    ],
+    'O': [
+        [[0,0,0], [1,0,0], [0,1,0], [1,1,0]],  # O形
+    ],
+    'S': [
+        [[0,0,0], [-1,0,0], [0,1,0], [1,1,0]],  # S形
+    ],
+    'Z': [
+        [[0,0,0], [1,0,0], [0,1,0], [-1,1,0]],  # Z形
+    ]
+}
+
+
+def configure_grid(width=None, height=None, depth=None):
+    """设置网格尺寸，为None的参数保持不变
+
+    其他模块在导入时按值读取网格尺寸（棋盘、界面和相机都在导入时创建），
+    所以必须在导入它们之前调用，main.py 在最开始解析命令行参数后调用。
+
+    Raises:
+        ValueError: 尺寸超出允许范围
+    """
+    global GRID_WIDTH, GRID_HEIGHT, GRID_DEPTH
+    width = GRID_WIDTH if width is None else width
+    height = GRID_HEIGHT if height is None else height
+    depth = GRID_DEPTH if depth is None else depth
+    for name, value in (('宽度', width), ('深度', depth)):
+        if not MIN_GRID_SIZE <= value <= MAX_GRID_SIZE:
+            raise ValueError(f"网格{name}必须在 {MIN_GRID_SIZE} 到 {MAX_GRID_SIZE} 之间: {value}")
+    if not MIN_GRID_HEIGHT <= height <= MAX_GRID_HEIGHT:
+        raise ValueError(f"网格高度必须在 {MIN_GRID_HEIGHT} 到 {MAX_GRID_HEIGHT} 之间: {height}")
+    GRID_WIDTH, GRID_HEIGHT, GRID_DEPTH = width, height, depth
@@ -1,5 +1,5 @@
 from ursina import *
-from core.game_grid import grid_positions
+from core.game_grid import grid_positions, layer_meshes
 import core.tetromino as tetromino
 from core.block import Block  # 从模块导入Block类
 import time
@@ -22,7 +22,9 @@ def update_score(points):
 def toggle_pause():
     """切换游戏暂停状态"""
     global game_paused, pause_ui
-    from core.tetromino import Tetromino
+    from core.game_logic import get_current_tetromino
+    
+    current = get_current_tetromino()
     
     game_paused = not game_paused
     
@@ -35,9 +37,8 @@ def toggle_pause():
         pause_ui = [pause_panel, pause_text, pause_hint]
         
         # 暂停游戏实体
-        for entity in scene.entities:
-            if isinstance(entity, Tetromino):
-                entity.enabled = False
+        if current:
+            current.enabled = False
     else:
         # 清除暂停界面
         for ui in pause_ui:
@@ -45,9 +46,12 @@ def toggle_pause():
         pause_ui = []
         
         # 恢复游戏实体
-        for entity in scene.entities:
-            if isinstance(entity, Tetromino):
-                entity.enabled = True
+        if current:
+            current.enabled = True
+        
+        # 暂停期间跳过了视图刷新，恢复后刷新一次
+        from ui.camera_setup import mark_views_dirty
+        mark_views_dirty()
 
 def setup_lighting():
     # 调整主光源
@@ -84,6 +88,7 @@ def reset_game():
     
     # 清除网格上的所有方块
     grid_positions.clear()
+    layer_meshes.clear()
     
     # 清除场景中的所有方块
     for entity in scene.entities.copy():
@@ -98,8 +103,10 @@ def reset_game():
             not isinstance(entity, DirectionalLight)):
             destroy(entity)
     
-    # 重置游戏状态
-    grid_positions.clear()
+    # 重置游戏状态（同时清空棋盘）
+    from core.game_logic import game_state, set_current_tetromino
+    game_state.reset()
+    set_current_tetromino(None)
     game_paused = False
     pause_ui = []
     
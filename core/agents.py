@@ -0,0 +1,61 @@
+"""自动玩家
+
+每个自动玩家提供 choose(state)，返回当前方块的落点 (朝向, x, z)，
+没有可用落点时返回None。由 GameState.place 执行放置。
+AGENTS 登记了可以在锦标赛中按名字使用的玩家。
+"""
+import random
+from functools import partial
+
+from core.autoplay import PlacementBot
+from core.rotation_table import BOTTOMS
+
+
+class RandomAgent:
+    """在所有能放下的落点中均匀随机选择"""
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+
+    def choose(self, state):
+        placements = state.placements()
+        if not placements:
+            return None
+        return self.rng.choice(placements)
+
+
+class LowestAgent:
+    """选择落地后方块最低的落点，同样低时选先找到的"""
+
+    def __init__(self, seed=None):
+        pass
+
+    def choose(self, state):
+        best = None
+        best_height = None
+        piece = state.piece
+        oy = piece.origin[1]
+        bottoms = BOTTOMS[piece.shape_key]
+        for placement in state.placements():
+            orientation, x, z = placement
+            height = oy - state.board.drop_distance((x, oy, z), bottoms[orientation])
+            if best_height is None or height < best_height:
+                best = placement
+                best_height = height
+        return best
+
+
+# 可按名字使用的自动玩家 {名字: 类}，构造参数为随机种子
+AGENTS = {
+    'random': RandomAgent,
+    'lowest': LowestAgent,
+    'placement': PlacementBot,
+    'placement_lookahead': partial(PlacementBot, lookahead=True),
+}
+
+
+def create_agent(name, seed=None):
+    """按名字创建自动玩家"""
+    if name not in AGENTS:
+        raise ValueError(f"未知的自动玩家: {name}，可选: {', '.join(AGENTS)}")
+    return AGENTS[name](seed)
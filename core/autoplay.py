@@ -0,0 +1,302 @@
+"""落点搜索自动玩家
+
+每个新方块出现时枚举它所有朝向和 (x, z) 落点，模拟直接落地和消层，
+用堆叠高度、空洞、表面起伏和消除层数给结果打分，选择得分最高的落点。
+可选向前多看一个方块：对得分最高的若干落点，再枚举预览中下一个方块的落点。
+
+模拟只使用每列的位掩码（第 y 位表示该列第 y 层有方块）：落地高度是一次
+bit_length，满层是所有列掩码的按位与，消层只对每列做移位，评估一个落点
+只需 O(列数) 次整数运算。相同棋盘和方块的搜索结果按棋盘的 Zobrist 哈希缓存。
+"""
+from core.rotation_table import ORIENTATIONS
+
+# 评估权重：总高度、消除层数、空洞数、表面起伏、最高列高度
+WEIGHTS = {
+    'height': -0.51,
+    'lines': 0.76,
+    'holes': -0.36,
+    'bumpiness': -0.18,
+    'max_height': -0.1,
+}
+
+# 超过生成高度（游戏结束）时的得分
+GAME_OVER_SCORE = -1e9
+
+# 缓存的棋盘状态上限，超过后清空重新积累
+CACHE_LIMIT = 50000
+
+# 不同棋盘尺寸的落点表 {(width, depth): {shape_key: [(placement, cells), ...]}}
+_placement_tables = {}
+_neighbor_tables = {}
+
+
+def placement_table(width, depth):
+    """预计算每个形状在界内的所有落点
+
+    Returns:
+        dict: {shape_key: [((朝向, x, z), ((列下标, dy), ...)), ...]}，
+              占据相同格子的落点只保留一个
+    """
+    key = (width, depth)
+    if key in _placement_tables:
+        return _placement_tables[key]
+
+    table = {}
+    for shape_key, orientations in ORIENTATIONS.items():
+        entries = []
+        seen = set()
+        for orientation, offsets in enumerate(orientations):
+            for x in range(width):
+                for z in range(depth):
+                    cells = []
+                    for dx, dy, dz in offsets:
+                        cx, cz = x + dx, z + dz
+                        if not (0 <= cx < width and 0 <= cz < depth):
+                            break
+                        cells.append((cx + cz * width, dy))
+                    else:
+                        # 不同朝向和原点可能占据完全相同的格子，落地结果一样，只保留第一个
+                        lowest = min(dy for _, dy in cells)
+                        footprint = frozenset((index, dy - lowest) for index, dy in cells)
+                        if footprint not in seen:
+                            seen.add(footprint)
+                            entries.append(((orientation, x, z), tuple(cells)))
+        table[shape_key] = entries
+    _placement_tables[key] = table
+    return table
+
+
+def board_columns(board):
+    """取出棋盘每列的占用位掩码，下标为 x + z * width"""
+    return list(board.column_masks())
+
+
+def drop_cells(columns, cells, oy):
+    """从生成高度 oy 直接落下后各格的 (列下标, y)，生成位置被占用或低于地面时返回None"""
+    landing = None
+    for index, dy in cells:
+        y = oy + dy
+        column = columns[index]
+        if y < 0 or column >> y & 1:
+            return None
+        # 该格下方最高方块之上的层号决定原点能落到的高度
+        floor = (column & ((1 << y) - 1)).bit_length() - dy
+        if landing is None or floor > landing:
+            landing = floor
+    return tuple((index, landing + dy) for index, dy in cells)
+
+
+def place_cells(columns, landed):
+    """把落地的格子写入列掩码并消除满层
+
+    Returns:
+        tuple: (新的列掩码列表, 消除层数)
+    """
+    columns = list(columns)
+    for index, y in landed:
+        columns[index] |= 1 << y
+
+    full = columns[0]
+    for column in columns:
+        full &= column
+    if not full:
+        return columns, 0
+
+    # 从高到低移除满层，保证较低层的位号不变
+    lines = 0
+    while full:
+        y = full.bit_length() - 1
+        full &= ~(1 << y)
+        low = (1 << y) - 1
+        columns = [(column & low) | (column >> (y + 1) << y) for column in columns]
+        lines += 1
+    return columns, lines
+
+
+def neighbor_table(width, depth):
+    """每列在 x 和 z 方向上的相邻列下标"""
+    key = (width, depth)
+    if key in _neighbor_tables:
+        return _neighbor_tables[key]
+    neighbors = []
+    for z in range(depth):
+        for x in range(width):
+            adjacent = []
+            for nx, nz in ((x - 1, z), (x + 1, z), (x, z - 1), (x, z + 1)):
+                if 0 <= nx < width and 0 <= nz < depth:
+                    adjacent.append(nx + nz * width)
+            neighbors.append(adjacent)
+    _neighbor_tables[key] = neighbors
+    return neighbors
+
+
+class BoardFeatures:
+    """一个棋盘的评估特征，用于增量计算落点得分
+
+    没有消层时，放下一个方块只改变它占据的几列，总高度、空洞和表面起伏
+    只需按这几列的变化修正，不必重新统计整个棋盘。
+    """
+
+    def __init__(self, columns, width, depth, spawn_height):
+        self.columns = columns
+        self.width = width
+        self.depth = depth
+        self.spawn_height = spawn_height
+        self.neighbors = neighbor_table(width, depth)
+        self.heights = [column.bit_length() for column in columns]
+        self.holes = [height - bin(column).count('1') for column, height in zip(columns, self.heights)]
+        self.max_height = max(self.heights)
+        self.total_height = sum(self.heights)
+        self.total_holes = sum(self.holes)
+        heights = self.heights
+        # 每条相邻边统计一次
+        self.bumpiness = sum(abs(heights[i] - heights[j])
+                             for i, adjacent in enumerate(self.neighbors)
+                             for j in adjacent if j > i)
+        # 每层被占用的列数，用于判断落地后是否出现满层
+        self.layer_counts = {}
+        for column in columns:
+            while column:
+                y = column.bit_length() - 1
+                column &= ~(1 << y)
+                self.layer_counts[y] = self.layer_counts.get(y, 0) + 1
+
+    def lines_after(self, landed):
+        """落地后会被填满的层数"""
+        added = {}
+        for _, y in landed:
+            added[y] = added.get(y, 0) + 1
+        size = self.width * self.depth
+        return sum(1 for y, count in added.items() if self.layer_counts.get(y, 0) + count == size)
+
+    def score_after(self, landed, lines=0):
+        """放下方块后的得分，落地后有满层时需改用 evaluate"""
+        columns = self.columns
+        heights = self.heights
+        changed = {}
+        for index, y in landed:
+            changed[index] = changed.get(index, columns[index]) | (1 << y)
+
+        total_height = self.total_height
+        total_holes = self.total_holes
+        max_height = self.max_height
+        new_heights = {}
+        for index, column in changed.items():
+            height = column.bit_length()
+            new_heights[index] = height
+            total_height += height - heights[index]
+            total_holes += height - bin(column).count('1') - self.holes[index]
+            if height > max_height:
+                max_height = height
+        if max_height > self.spawn_height:
+            return GAME_OVER_SCORE
+
+        bumpiness = self.bumpiness
+        for index, height in new_heights.items():
+            old = heights[index]
+            for other in self.neighbors[index]:
+                if other in new_heights:
+                    if other < index:
+                        continue  # 两端都变化的边只修正一次
+                    other_new = new_heights[other]
+                else:
+                    other_new = heights[other]
+                bumpiness += abs(height - other_new) - abs(old - heights[other])
+
+        return (WEIGHTS['height'] * total_height
+                + WEIGHTS['lines'] * lines
+                + WEIGHTS['holes'] * total_holes
+                + WEIGHTS['bumpiness'] * bumpiness
+                + WEIGHTS['max_height'] * max_height)
+
+
+def evaluate(columns, width, depth, lines, spawn_height):
+    """按权重给一个棋盘打分，越高越好"""
+    features = BoardFeatures(columns, width, depth, spawn_height)
+    return features.score_after((), lines)
+
+
+class PlacementBot:
+    """枚举所有落点并选择评估得分最高的自动玩家"""
+
+    def __init__(self, seed=None, lookahead=False, beam=4):
+        """
+        Args:
+            seed: 未使用，与其他自动玩家的构造参数保持一致
+            lookahead: 是否利用下一个方块的预览多看一步
+            beam: 多看一步时只展开第一步得分最高的这么多个落点
+        """
+        self.lookahead = lookahead
+        self.beam = beam
+        self.cache = {}
+
+    def candidates(self, columns, shape_key, table, oy, width, depth, spawn_height, lines=0):
+        """枚举一个方块的所有落点，返回 [(得分, 落点, 落地格子, 累计消层数)]
+
+        """
+        features = BoardFeatures(columns, width, depth, spawn_height)
+        results = []
+        for placement, cells in table[shape_key]:
+            landed = drop_cells(columns, cells, oy)
+            if landed is None:
+                continue
+            if features.lines_after(landed):
+                placed, cleared = place_cells(columns, landed)
+                score = evaluate(placed, width, depth, lines + cleared, spawn_height)
+            else:
+                cleared = 0
+                score = features.score_after(landed, lines)
+            results.append((score, placement, landed, lines + cleared))
+        return results
+
+    def search(self, columns, shape_key, next_shape_key, width, depth, oy, spawn_height, board_key=None):
+        """搜索当前方块的最佳落点，没有可用落点时返回None
+
+        Args:
+            board_key: 棋盘的缓存键，默认使用列掩码本身；有 Zobrist 哈希时传入哈希更省
+        """
+        if board_key is None:
+            board_key = tuple(columns)
+        key = (board_key, shape_key, next_shape_key if self.lookahead else None, oy)
+        if key in self.cache:
+            return self.cache[key]
+
+        table = placement_table(width, depth)
+        first = self.candidates(columns, shape_key, table, oy, width, depth, spawn_height)
+        if not first:
+            best = None
+        elif not self.lookahead or next_shape_key is None:
+            best = max(first, key=lambda result: result[0])[1]
+        else:
+            # 只展开第一步得分最高的若干落点，用第二个方块的最佳得分作为评价
+            first.sort(key=lambda result: result[0], reverse=True)
+            best = None
+            best_score = None
+            for score, placement, landed, lines in first[:self.beam]:
+                if score > GAME_OVER_SCORE:
+                    placed, _ = place_cells(columns, landed)
+                    second = self.candidates(placed, next_shape_key, table, oy,
+                                             width, depth, spawn_height, lines)
+                    if second:
+                        score = max(result[0] for result in second)
+                if best_score is None or score > best_score:
+                    best = placement
+                    best_score = score
+
+        if len(self.cache) >= CACHE_LIMIT:
+            self.cache.clear()
+        self.cache[key] = best
+        return best
+
+    def choose(self, state):
+        """为 GameState 的当前方块选择落点 (朝向, x, z)
+
+        与 GameState.place 一致，总是从生成高度开始搜索，不受方块当前已经下落到哪里的影响。
+        """
+        piece = state.piece
+        if piece is None:
+            return None
+        board = state.board
+        return self.search(board_columns(board), piece.shape_key, state.next_shape_key,
+                           state.width, state.depth, state.spawn_origin()[1], state.height,
+                           board_key=board.zobrist)
@@ -0,0 +1,294 @@
+"""多棋盘批量模拟环境
+
+N 个棋盘叠成一个 uint8 数组 boards[n, y, x, z]（调色板下标同 VoxelVolume），
+每次 step 对整批棋盘同时完成放置、碰撞、消层和计分，全部是 NumPy 数组运算，
+不经过场景图，也不逐个推进方块。接口与 gym 相同：
+
+    env = BatchEnv(num_envs=256, seed=0)
+    obs = env.reset()
+    obs, rewards, dones, info = env.step(actions)
+
+每一步为每个棋盘选择一个落点：动作编号 = 朝向 * W * D + x * D + z，
+表示把当前方块转到该朝向后从上方直接落到 (x, z) 列。朝向与
+core.rotation_table 中的朝向表一致，计分与 GameState.check_lines 相同。
+与 GameState 相同，堆叠超过生成高度，或下一个方块在生成位置与已有方块重叠时
+游戏结束；选择越界的落点也视为结束。
+结束的棋盘会自动重新开始，info 中给出结束时的分数。
+
+方块序列与 GameState 使用同一个 PieceSource：第 i 个棋盘的第 k 局使用种子
+seed + i + k * num_envs，与 GameState(seed=该种子) 的方块序列完全相同，
+info 中的 final_seed 给出结束的那一局的种子，可以单独复现。
+
+numpy 是可选依赖，只有使用本模块时才需要。
+"""
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖
+    np = None
+
+from config.rules import GRID_WIDTH, GRID_HEIGHT, GRID_DEPTH, PIECE_POLICY
+from core.game_state import LINE_SCORE
+from core.piece_source import PieceSource
+from core.rotation_table import ORIENTATIONS
+from core.voxel_volume import SHAPE_PALETTE, PALETTE_INDEX
+
+# 每个形状最多的朝向数，决定动作空间大小
+MAX_ORIENTATIONS = max(len(orientations) for orientations in ORIENTATIONS.values())
+
+# 每个棋盘预先生成的方块数，用完后整段补充，每步取方块只需一次数组索引
+QUEUE_SIZE = 16
+
+
+def build_action_tables(width, depth):
+    """预计算每个形状、每个动作对应的格子偏移和合法性
+
+    Returns:
+        tuple: (legal, cell_x, cell_z, cell_dy)
+            legal: (形状数+1, 动作数) 的布尔数组，下标0为空形状
+            cell_x, cell_z: 各格子落在的列，(形状数+1, 动作数, 4)
+            cell_dy: 各格子相对原点的高度偏移，(形状数+1, 动作数, 4)
+    """
+    num_actions = MAX_ORIENTATIONS * width * depth
+    shape_count = len(SHAPE_PALETTE)
+    legal = np.zeros((shape_count, num_actions), dtype=bool)
+    cell_x = np.zeros((shape_count, num_actions, 4), dtype=np.int64)
+    cell_z = np.zeros((shape_count, num_actions, 4), dtype=np.int64)
+    cell_dy = np.zeros((shape_count, num_actions, 4), dtype=np.int64)
+
+    for index, shape_key in enumerate(SHAPE_PALETTE):
+        if shape_key is None:
+            continue
+        for orientation, offsets in enumerate(ORIENTATIONS[shape_key]):
+            for x in range(width):
+                for z in range(depth):
+                    action = (orientation * width + x) * depth + z
+                    xs = [x + dx for dx, _, _ in offsets]
+                    zs = [z + dz for _, _, dz in offsets]
+                    if min(xs) < 0 or max(xs) >= width or min(zs) < 0 or max(zs) >= depth:
+                        continue
+                    legal[index, action] = True
+                    cell_x[index, action] = xs
+                    cell_z[index, action] = zs
+                    cell_dy[index, action] = [dy for _, dy, _ in offsets]
+    return legal, cell_x, cell_z, cell_dy
+
+
+def build_spawn_cells(width, height, depth):
+    """预计算每个形状在生成位置（初始朝向）占据的格子，与 GameState.spawn_origin 一致
+
+    Returns:
+        tuple: (spawn_y, spawn_x, spawn_z)，形状均为 (形状数+1, 4)；空形状的格子
+               放在生成位置之上一层，不会被占用
+    """
+    shape_count = len(SHAPE_PALETTE)
+    ox, oy, oz = width // 2, height, depth // 2
+    spawn_y = np.full((shape_count, 4), oy + 3, dtype=np.int64)
+    spawn_x = np.full((shape_count, 4), ox, dtype=np.int64)
+    spawn_z = np.full((shape_count, 4), oz, dtype=np.int64)
+    for index, shape_key in enumerate(SHAPE_PALETTE):
+        if shape_key is None:
+            continue
+        offsets = ORIENTATIONS[shape_key][0]
+        spawn_x[index] = [ox + dx for dx, _, _ in offsets]
+        spawn_y[index] = [oy + dy for _, dy, _ in offsets]
+        spawn_z[index] = [oz + dz for _, _, dz in offsets]
+    return spawn_y, spawn_x, spawn_z
+
+
+class BatchEnv:
+    """同时模拟 num_envs 局游戏的批量环境"""
+
+    def __init__(self, num_envs, width=GRID_WIDTH, height=GRID_HEIGHT, depth=GRID_DEPTH, seed=None,
+                 policy=PIECE_POLICY):
+        """
+        Args:
+            num_envs: 同时模拟的棋盘数
+            width, height, depth: 网格尺寸，height 是生成高度
+            seed: 方块序列的随机种子，为None时每次运行不同
+            policy: 出块方式，'uniform' 或 'bag'
+        """
+        if np is None:
+            raise ImportError("批量环境需要先安装 numpy: pip install numpy")
+        self.num_envs = num_envs
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.num_actions = MAX_ORIENTATIONS * width * depth
+        self.legal, self.cell_x, self.cell_z, self.cell_dy = build_action_tables(width, depth)
+        self.spawn_y, self.spawn_x, self.spawn_z = build_spawn_cells(width, height, depth)
+
+        # 生成高度之上留出余量，越过生成高度的方块也能完整写入
+        self.board_height = height + 4
+        self.boards = np.zeros((num_envs, self.board_height, width, depth), dtype=np.uint8)
+        self.heights = np.zeros((num_envs, width, depth), dtype=np.int64)
+        self.shapes = np.zeros(num_envs, dtype=np.int64)
+        self.next_shapes = np.zeros(num_envs, dtype=np.int64)
+        self.scores = np.zeros(num_envs, dtype=np.int64)
+        self.lines_cleared = np.zeros(num_envs, dtype=np.int64)
+        self.pieces_placed = np.zeros(num_envs, dtype=np.int64)
+        self._env_index = np.arange(num_envs)
+        self.seed = seed
+        self.sources = [PieceSource(policy=policy) for _ in range(num_envs)]
+        self.game_seeds = [None] * num_envs  # 每个棋盘当前这一局的种子
+        # 每个棋盘之后的方块（调色板下标），从 queue_pos 开始是还没有发出的部分
+        self.queue = np.zeros((num_envs, QUEUE_SIZE), dtype=np.int64)
+        self.queue_pos = np.full(num_envs, QUEUE_SIZE, dtype=np.int64)
+
+    def _game_seed(self, env):
+        """某个棋盘下一局的种子"""
+        if self.seed is None:
+            return None
+        current = self.game_seeds[env]
+        return self.seed + env if current is None else current + self.num_envs
+
+    def _refill(self, envs):
+        """把指定棋盘剩余的方块移到队列开头，后面用方块序列补满"""
+        for env in envs:
+            remaining = self.queue[env, self.queue_pos[env]:].copy()
+            count = len(remaining)
+            self.queue[env, :count] = remaining
+            self.queue[env, count:] = [PALETTE_INDEX[key] for key in self.sources[env].take(QUEUE_SIZE - count)]
+            self.queue_pos[env] = 0
+
+    def _advance_pieces(self, envs):
+        """为指定的棋盘发出下一个方块，并更新预览
+
+        Args:
+            envs: 棋盘下标数组
+        """
+        # 当前方块和预览需要两个，不够时先补充
+        self._refill(envs[self.queue_pos[envs] + 2 > QUEUE_SIZE].tolist())
+        pos = self.queue_pos[envs]
+        self.shapes[envs] = self.queue[envs, pos]
+        self.next_shapes[envs] = self.queue[envs, pos + 1]
+        self.queue_pos[envs] = pos + 1
+
+    def _reset_envs(self, mask):
+        """重新开始指定的棋盘，每个棋盘换用下一局的种子"""
+        self.boards[mask] = 0
+        self.heights[mask] = 0
+        self.scores[mask] = 0
+        self.lines_cleared[mask] = 0
+        self.pieces_placed[mask] = 0
+        envs = np.flatnonzero(mask)
+        for env in envs.tolist():
+            seed = self._game_seed(env)
+            self.game_seeds[env] = seed
+            self.sources[env].reset(seed)
+        self.queue_pos[envs] = QUEUE_SIZE
+        self._advance_pieces(envs)
+
+    def reset(self, seed=None):
+        """重新开始所有棋盘
+
+        Args:
+            seed: 新的种子，为None时沿用构造时的种子，从第一局重新开始
+
+        Returns:
+            dict: 观测，见 observation()
+        """
+        if seed is not None:
+            self.seed = seed
+        self.game_seeds = [None] * self.num_envs
+        self._reset_envs(np.ones(self.num_envs, dtype=bool))
+        return self.observation()
+
+    def action_mask(self):
+        """每个棋盘当前方块的合法动作，形状为 (num_envs, num_actions)"""
+        return self.legal[self.shapes]
+
+    def observation(self):
+        """当前观测
+
+        Returns:
+            dict:
+                board: (num_envs, height, width, depth) 的调色板下标，0为空，是内部数组的视图
+                heights: (num_envs, width, depth) 的列高
+                shape: 当前方块的调色板下标
+                next_shape: 下一个方块的调色板下标
+                action_mask: 合法动作
+        """
+        return {
+            'board': self.boards[:, :self.height],
+            'heights': self.heights,
+            'shape': self.shapes,
+            'next_shape': self.next_shapes,
+            'action_mask': self.action_mask(),
+        }
+
+    def step(self, actions):
+        """为每个棋盘放置当前方块
+
+        Args:
+            actions: 长度为 num_envs 的动作编号
+
+        Returns:
+            tuple: (observation, rewards, dones, info)
+                info 包含本步消除的层数 lines，以及结束时的 final_score、
+                final_lines、final_pieces（未结束的棋盘为0）和 final_seed
+                （结束的那一局的种子，未结束的棋盘为None）
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        envs = self._env_index
+        shapes = self.shapes
+        legal = self.legal[shapes, actions]
+
+        # 落点：每个格子落在所在列的顶上，方块原点取各格要求的最高值
+        xs = self.cell_x[shapes, actions]
+        zs = self.cell_z[shapes, actions]
+        dys = self.cell_dy[shapes, actions]
+        column_tops = self.heights[envs[:, None], xs, zs]
+        base = (column_tops - dys).max(axis=1)
+        ys = base[:, None] + dys
+
+        # 写入方块；越出数组的格子只会出现在已经结束的棋盘上
+        write = legal[:, None] & (ys < self.board_height)
+        write_env = np.broadcast_to(envs[:, None], ys.shape)[write]
+        self.boards[write_env, ys[write], xs[write], zs[write]] = shapes[write_env]
+        np.maximum.at(self.heights, (write_env, xs[write], zs[write]), ys[write] + 1)
+        self.pieces_placed += legal
+
+        # 消层：按是否填满做稳定排序，未满的层保持原顺序排在下面，再把顶部清空
+        full = self.boards.reshape(self.num_envs, self.board_height, -1).all(axis=2)
+        lines = full.sum(axis=1)
+        cleared = lines > 0
+        if cleared.any():
+            boards = self.boards[cleared]
+            order = np.argsort(full[cleared], axis=1, kind='stable')
+            boards = np.take_along_axis(boards, order[:, :, None, None], axis=1)
+            rows = np.arange(self.board_height)
+            boards[rows[None, :] >= (self.board_height - lines[cleared])[:, None]] = 0
+            self.boards[cleared] = boards
+            self.heights[cleared] = self._column_heights(boards)
+
+        rewards = LINE_SCORE * lines
+        self.scores += rewards
+        self.lines_cleared += lines
+
+        # 与 GameState 相同：堆叠超过生成高度，或下一个方块在生成位置放不下时游戏结束
+        over = self.heights.reshape(self.num_envs, -1).max(axis=1) > self.height
+        dones = ~legal | over | self._spawn_blocked(self.next_shapes)
+        info = {
+            'lines': lines,
+            'final_score': np.where(dones, self.scores, 0),
+            'final_lines': np.where(dones, self.lines_cleared, 0),
+            'final_pieces': np.where(dones, self.pieces_placed, 0),
+            'final_seed': [self.sources[env].seed if done else None for env, done in enumerate(dones)],
+        }
+
+        if dones.any():
+            self._reset_envs(dones)
+        self._advance_pieces(np.flatnonzero(~dones))
+        return self.observation(), rewards, dones, info
+
+    def _spawn_blocked(self, shapes):
+        """各棋盘的指定形状在生成位置是否与已有方块重叠"""
+        cells = self.boards[self._env_index[:, None], self.spawn_y[shapes],
+                            self.spawn_x[shapes], self.spawn_z[shapes]]
+        return (cells != 0).any(axis=1)
+
+    def _column_heights(self, boards):
+        """每列最高方块之上的层号，boards 形状为 (n, H, W, D)"""
+        occupied = boards != 0
+        top_from_above = occupied[:, ::-1].argmax(axis=1)
+        return np.where(occupied.any(axis=1), self.board_height - top_from_above, 0)
@@ -0,0 +1,232 @@
+"""按层位掩码保存的网格占用引擎
+
+每一层用一个整数位掩码表示占用情况，(x, z) 格对应第 x + z * width 位；
+颜色单独存放在每层的字典中。满层检测只需一次掩码比较，
+多层消除在一次遍历中完成压缩。
+
+同时按列保存位掩码（第 y 位表示该列第 y 层有方块），并维护每列高度和
+整体最高堆叠高度，只在落地和消层时更新，供游戏结束判断、幽灵方块和
+俯视图以 O(1) 查询。
+
+zobrist 是随格子增删和消层增量更新的64位棋盘哈希（见 core.zobrist），
+只反映占用情况，可以直接作为缓存键或逐帧校验值。
+"""
+from core.zobrist import cell_key, layer_term
+
+
+class LayerOccupancy:
+    """以层为单位的占用网格，对外提供与 {(x, y, z): shape_key} 字典相同的接口"""
+
+    def __init__(self, width, depth):
+        self.width = width
+        self.depth = depth
+        self.full_mask = (1 << (width * depth)) - 1
+        self.layers = []  # 每层的占用位掩码
+        self.colors = []  # 每层各格的形状键 {(x, z): shape_key}，由调色板决定颜色
+        self.columns = [0] * (width * depth)  # 每列的占用位掩码，下标为 x + z * width
+        self.heights = [0] * (width * depth)  # 每列最高方块之上的层号，空列为0
+        self.max_height = 0  # 整个棋盘的最高堆叠高度
+        self.layer_hashes = []  # 每层的 Zobrist 哈希
+        self.zobrist = 0  # 整个棋盘的 Zobrist 哈希
+        self._cell_keys = [cell_key(index % width, index // width) for index in range(width * depth)]
+        self._count = 0
+
+    def _bit(self, x, z):
+        return 1 << (x + z * self.width)
+
+    def _ensure_layer(self, y):
+        while len(self.layers) <= y:
+            self.layers.append(0)
+            self.colors.append({})
+            self.layer_hashes.append(0)
+
+    def is_occupied(self, x, y, z):
+        """判断某格是否被占用，越界的格子视为空"""
+        if 0 <= y < len(self.layers) and 0 <= x < self.width and 0 <= z < self.depth:
+            return bool(self.layers[y] >> (x + z * self.width) & 1)
+        return False
+
+    def top_cells(self):
+        """逐列给出最高方块 {(x, z): (y, shape_key)}，空列不包含在内"""
+        tops = {}
+        for index, height in enumerate(self.heights):
+            if height:
+                x, z = index % self.width, index // self.width
+                tops[(x, z)] = (height - 1, self.colors[height - 1][(x, z)])
+        return tops
+
+    def column_masks(self):
+        """每列的占用位掩码（第 y 位表示第 y 层有方块），下标为 x + z * width"""
+        return self.columns
+
+    def layer_mask(self, y):
+        """获取某层的占用位掩码"""
+        return self.layers[y] if 0 <= y < len(self.layers) else 0
+
+    def fits(self, origin, offsets):
+        """判断以 origin 为原点、按 offsets 摆放的方块是否在界内且不与已有方块重叠"""
+        ox, oy, oz = origin
+        width = self.width
+        layers = self.layers
+        top = len(layers)
+        for bx, by, bz in offsets:
+            x = ox + bx
+            y = oy + by
+            z = oz + bz
+            if not (0 <= x < width and y >= 0 and 0 <= z < self.depth):
+                return False
+            if y < top and layers[y] >> (x + z * width) & 1:
+                return False
+        return True
+
+    def first_fit(self, origin, candidates):
+        """返回第一个能放下的候选摆放下标，都放不下时返回-1"""
+        for index, offsets in enumerate(candidates):
+            if self.fits(origin, offsets):
+                return index
+        return -1
+
+    def drop_distance(self, origin, bottoms):
+        """方块从 origin 处能够直接下落的格数
+
+        Args:
+            origin: 方块原点 (x, y, z)
+            bottoms: 方块在各列最低格的偏移，只需检查这些格下方
+        """
+        ox, oy, oz = origin
+        columns = self.columns
+        distance = None
+        for bx, by, bz in bottoms:
+            y = oy + by
+            # 该列在方块下方的最高方块之上的层号
+            floor = (columns[ox + bx + (oz + bz) * self.width] & ((1 << y) - 1)).bit_length()
+            if distance is None or y - floor < distance:
+                distance = y - floor
+        return distance or 0
+
+    def get(self, pos, default=None):
+        x, y, z = pos
+        if self.is_occupied(x, y, z):
+            return self.colors[y][(x, z)]
+        return default
+
+    def __contains__(self, pos):
+        return self.is_occupied(*pos)
+
+    def __getitem__(self, pos):
+        x, y, z = pos
+        if not self.is_occupied(x, y, z):
+            raise KeyError(pos)
+        return self.colors[y][(x, z)]
+
+    def __setitem__(self, pos, value):
+        x, y, z = pos
+        if not (0 <= x < self.width and y >= 0 and 0 <= z < self.depth):
+            raise ValueError(f"网格坐标越界: {pos}")
+        self._ensure_layer(y)
+        bit = self._bit(x, z)
+        if not self.layers[y] & bit:
+            self.layers[y] |= bit
+            self._count += 1
+            index = x + z * self.width
+            self._toggle_hash(index, y)
+            self.columns[index] |= 1 << y
+            if y >= self.heights[index]:
+                self.heights[index] = y + 1
+                self.max_height = max(self.max_height, y + 1)
+        self.colors[y][(x, z)] = value
+
+    def __delitem__(self, pos):
+        x, y, z = pos
+        if not self.is_occupied(x, y, z):
+            raise KeyError(pos)
+        self.layers[y] &= ~self._bit(x, z)
+        del self.colors[y][(x, z)]
+        self._count -= 1
+        index = x + z * self.width
+        self._toggle_hash(index, y)
+        self.columns[index] &= ~(1 << y)
+        self.heights[index] = self.columns[index].bit_length()
+        self.max_height = max(self.heights)
+
+    def _toggle_hash(self, index, y):
+        """某格占用状态改变时更新该层和整个棋盘的哈希"""
+        old = self.layer_hashes[y]
+        new = old ^ self._cell_keys[index]
+        self.layer_hashes[y] = new
+        self.zobrist ^= layer_term(old, y) ^ layer_term(new, y)
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for y, layer_colors in enumerate(self.colors):
+            for x, z in layer_colors:
+                yield (x, y, z)
+
+    def items(self):
+        for y, layer_colors in enumerate(self.colors):
+            for (x, z), value in layer_colors.items():
+                yield (x, y, z), value
+
+    def clear(self):
+        self.layers.clear()
+        self.colors.clear()
+        self.columns = [0] * (self.width * self.depth)
+        self.heights = [0] * (self.width * self.depth)
+        self.max_height = 0
+        self.layer_hashes.clear()
+        self.zobrist = 0
+        self._count = 0
+
+    def full_layers(self, layers=None):
+        """返回已填满的层号（升序）
+
+        Args:
+            layers: 只检查这些层；为None时检查所有层
+        """
+        if layers is None:
+            layers = range(len(self.layers))
+        return sorted(y for y in set(layers) if self.layer_mask(y) == self.full_mask)
+
+    def clear_layers(self, layers):
+        """一次性移除指定的层，上方各层整体下移
+
+        Args:
+            layers: 要移除的层号
+
+        Returns:
+            int: 实际移除的层数
+        """
+        removed = {y for y in layers if 0 <= y < len(self.layers)}
+        if not removed:
+            return 0
+
+        lowest = min(removed)
+        kept_layers = []
+        kept_colors = []
+        kept_hashes = []
+        for y in range(lowest, len(self.layers)):
+            # 去掉这一层原来的哈希贡献，下移后按新层号重新加入
+            self.zobrist ^= layer_term(self.layer_hashes[y], y)
+            if y in removed:
+                self._count -= len(self.colors[y])
+            else:
+                kept_layers.append(self.layers[y])
+                kept_colors.append(self.colors[y])
+                kept_hashes.append(self.layer_hashes[y])
+        self.layers[lowest:] = kept_layers
+        self.colors[lowest:] = kept_colors
+        self.layer_hashes[lowest:] = kept_hashes
+        for y in range(lowest, len(self.layer_hashes)):
+            self.zobrist ^= layer_term(self.layer_hashes[y], y)
+
+        # 按列去掉被消除层对应的位，从上往下处理保证位号不变
+        descending = sorted(removed, reverse=True)
+        for index, column in enumerate(self.columns):
+            for y in descending:
+                column = (column & ((1 << y) - 1)) | (column >> (y + 1) << y)
+            self.columns[index] = column
+            self.heights[index] = column.bit_length()
+        self.max_height = max(self.heights)
+        return len(removed)
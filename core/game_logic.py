@@ -1,15 +1,92 @@
 from ursina import *
-from random import choice
 import sys
 import time
 import os
 from core.tetromino import Tetromino
+from core.game_state import GameState, TICK_RATE
+from core.replay import ReplayRecorder, ReplayPlayer, EXTENSION
+from core.autoplay import PlacementBot
+from core.game_grid import grid_positions, layer_meshes, show_cleared_layers
 from util.utils import debug_grid
+from util import profiler
 from ui.ui import update_next_preview, show_game_over_ui
 from util.history_manager import history_ui_active  # 导入历史界面状态
+import config.settings as settings
 
-# 添加全局变量以存储下一个方块形状
-next_shape_key = None
+# 游戏规则全部由GameState处理，界面只根据它产生的事件更新画面
+game_state = GameState(board=grid_positions, record_events=True)
+
+# 界面使用的GameState在落地流程各步骤计时，无界面模拟不受影响
+game_state.lock = profiler.timed('land')(game_state.lock)
+game_state.check_lines = profiler.timed(
+    'check_lines', lambda layers: {'layers_cleared': len(layers)})(game_state.check_lines)
+game_state.spawn = profiler.timed(
+    'spawn', lambda piece: {'shape': piece.shape_key})(game_state.spawn)
+
+# 按键到游戏动作的映射，其他按键（包括松开空格）对应 'none'
+KEY_ACTIONS = {
+    'left arrow': 'left',
+    'right arrow': 'right',
+    'up arrow': 'forward',
+    'down arrow': 'back',
+    'w': 'rotate_x',   # X轴旋转
+    's': 'rotate_z',   # Z轴旋转
+    'd': 'rotate_y',   # Y轴旋转
+    'space': 'soft_drop',  # 加速下落
+    'alt': 'hard_drop',    # 直接落地
+}
+
+# 自动演示：按B键切换，每个方块出现后等待一小段时间再由自动玩家放下
+autoplay_bot = PlacementBot(lookahead=True)
+autoplay_enabled = False
+autoplay_timer = 0
+AUTOPLAY_DELAY = 0.3
+
+# 回放模式（python main.py --replay <文件>）：由ReplayPlayer按录制的帧号驱动游戏，不响应游戏按键
+replay_player = None
+replay_speed = 1.0
+replay_time = 0.0
+replay_reported = False
+
+# 当前方块的画面，由apply_state_events维护
+current_tetromino = None
+
+def get_current_tetromino():
+    """获取当前受控制的方块，没有时返回None"""
+    return current_tetromino
+
+def set_current_tetromino(tetromino):
+    """登记当前受控制的方块，方块落地后传入None"""
+    global current_tetromino
+    current_tetromino = tetromino
+
+def start_recording():
+    """从当前的种子开始录制本局的操作，在生成第一个方块之前调用"""
+    ReplayRecorder.for_state(game_state)
+
+def start_replay(replay, speed=1.0):
+    """用界面的GameState重放一局录制的游戏，代替生成第一个方块"""
+    global replay_player, replay_speed
+    replay_player = ReplayPlayer(replay, game_state)
+    replay_speed = speed
+    apply_state_events()
+    print(f"回放: 种子 {replay.seed}, {replay.ticks} 帧, {replay_speed:g} 倍速")
+
+def save_replay():
+    """把本局的录制写入 data/replays，每局只保存一次
+
+    Returns:
+        str: 文件路径，没有在录制或已经保存过时为None
+    """
+    from util.history_manager import GAME_DIR
+    recorder = game_state.recorder
+    if recorder is None or recorder.finished or replay_player is not None:
+        return None
+    path = os.path.join(GAME_DIR, 'data', 'replays', time.strftime('%Y%m%d_%H%M%S') + EXTENSION)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    size = recorder.save(path, game_state)
+    print(f"已保存回放 ({size} 字节): {path}")
+    return path
 
 def save_current_game_state():
     """保存当前游戏状态到历史记录"""
@@ -17,6 +94,11 @@ def save_current_game_state():
     from util.score_manager import get_current_score
     from util.history_manager import save_game_history
     
+    # 回放不计入历史记录
+    if replay_player is not None:
+        return
+    save_replay()
+    
     # 计算游戏持续时间
     game_duration = time.time() - settings.game_start_time if settings.game_start_time else 0
     
@@ -46,43 +128,116 @@ def end_game_and_exit():
 
 def spawn_tetromino():
     """生成新的俄罗斯方块"""
-    global next_shape_key
-    
-    from config.config import shapes, GRID_WIDTH, GRID_DEPTH, GRID_HEIGHT
-    from core.game_grid import grid_positions
-    
     try:
-        # 首先检查生成位置是否已被占用
-        if any(grid_positions.get((x, GRID_HEIGHT, z)) for x in range(GRID_WIDTH) for z in range(GRID_DEPTH)):
-            print("生成位置已被占用，游戏结束！")
-            
-            # 游戏结束界面在Tetromino.land()中处理
-            
-            # 延迟退出，确保玩家能看到分数
-            invoke(end_game_and_exit, delay=3)
-            return None
-        
-        # 如果没有预先选择的下一个形状，就随机生成一个
-        current_shape_key = next_shape_key if next_shape_key else choice(list(shapes.keys()))
-        # 为下一个方块随机选择新形状
-        next_shape_key = choice(list(shapes.keys()))
-        
-        # 更新预览
-        from ui.ui import next_preview
-        update_next_preview(next_shape_key, next_preview)
-        
-        # 生成当前方块
-        tetromino = Tetromino(shape_key=current_shape_key)
-        invoke(tetromino.update_ghost_position, delay=0.1)
-        return tetromino
+        game_state.spawn()
+        apply_state_events()
+        return current_tetromino
     except Exception as e:
         print(f"生成方块错误: {e}")
         return None
 
+@profiler.timed('update_game')
+def update_game():
+    """每帧按经过的时间推进游戏状态，并同步画面"""
+    global autoplay_timer
+    if settings.game_paused or game_state.game_over:
+        return
+    if replay_player is not None:
+        update_replay()
+        return
+    if autoplay_enabled and game_state.piece is not None:
+        autoplay_timer += time.dt
+        if autoplay_timer >= AUTOPLAY_DELAY:
+            autoplay_timer = 0
+            placement = autoplay_bot.choose(game_state)
+            if placement:
+                game_state.place(*placement)
+    start = profiler.begin('tick')
+    game_state.tick(time.dt)
+    profiler.end('tick', start)
+    apply_state_events()
+
+def update_replay():
+    """按经过的时间和回放速度推进回放，结束时报告是否与录制一致"""
+    global replay_time, replay_reported
+    replay_time += time.dt * replay_speed
+    ticks = int(replay_time * TICK_RATE)
+    replay_time -= ticks / TICK_RATE
+    start = profiler.begin('tick')
+    replay_player.advance(ticks)
+    profiler.end('tick', start)
+    apply_state_events()
+    if replay_player.finished and not replay_reported:
+        replay_reported = True
+        ok, divergence = replay_player.verify()
+        print("回放结束，与录制一致" if ok else f"回放结束，第 {divergence} 帧的落地状态与录制时不同")
+
+def toggle_autoplay():
+    """切换自动演示模式"""
+    global autoplay_enabled, autoplay_timer
+    autoplay_enabled = not autoplay_enabled
+    autoplay_timer = 0
+    print(f"自动演示: {'开启' if autoplay_enabled else '关闭'}")
+
+@profiler.timed('events')
+def apply_state_events():
+    """根据GameState产生的事件更新画面、音效和统计"""
+    from audio.audio import play_landing_sound  # 导入落地音效函数
+    from ui.camera_setup import mark_views_dirty
+    
+    events = game_state.pop_events()
+    if not events:
+        return
+    
+    # 最后一次落地之前的移动、旋转和生成都属于本批中已经落地的方块，不再同步画面
+    live_from = max((i for i, event in enumerate(events) if event[0] == 'locked'), default=-1)
+    
+    for i, event in enumerate(events):
+        kind = event[0]
+        retired = i < live_from
+        if kind == 'moved' and current_tetromino and not retired:
+            current_tetromino.sync(rotated=False)
+        elif kind == 'rotated' and current_tetromino and not retired:
+            current_tetromino.sync()
+        elif kind == 'locked':
+            _, shape_key, cells = event
+            # 移除活动方块的画面，落地的格子所在层及相邻层需要重建网格
+            if current_tetromino:
+                current_tetromino.remove()
+            set_current_tetromino(None)
+            play_landing_sound()
+            layer_meshes.mark_cells_dirty(cells)
+            print(f"方块固定在: 网格{cells}")
+        elif kind == 'cleared':
+            show_cleared_layers(event[1])
+        elif kind == 'spawned':
+            # 更新预览并按事件中的方块生成画面，本批中已经落地的方块不生成
+            _, shape_key, piece, next_shape_key = event
+            from ui.ui import next_preview
+            update_next_preview(next_shape_key, next_preview)
+            if not retired:
+                start = profiler.begin('spawn_tetromino')
+                set_current_tetromino(Tetromino(piece, game_state.board))
+                profiler.end('spawn_tetromino', start)
+        elif kind == 'game_over':
+            print("检测到游戏结束条件！")
+            
+            # 使用通用函数保存游戏历史记录
+            save_current_game_state()
+            show_game_over_ui()
+            # 延迟退出，确保玩家能看到分数
+            invoke(application.quit, delay=3)
+    
+    # 统一重建本批事件中受影响的层网格
+    layer_meshes.rebuild()
+    mark_views_dirty()
+    
+    if any(event[0] == 'locked' for event in events):
+        debug_grid()  # 打印当前网格状态
+
 def process_input(key):
     from config.settings import game_paused, toggle_pause
     from ui.camera_setup import reset_camera
-    from core.tetromino import Tetromino
     from util.history_manager import history_ui_active, close_history_ui
     
     # 处理历史界面的ESC键
@@ -92,6 +247,20 @@ def process_input(key):
     
     if key == 'v':
         reset_camera()
+    
+    # 性能分析：F3开关浮层，F4导出CSV，F5开始/结束时间线记录，暂停时也可以使用
+    if key == 'f3':
+        from ui.profiler_overlay import toggle_profiler
+        toggle_profiler()
+        return
+    if key == 'f4':
+        from ui.profiler_overlay import dump_profile
+        dump_profile()
+        return
+    if key == 'f5':
+        from ui.profiler_overlay import toggle_trace
+        toggle_trace()
+        return
         
     # 暂停控制
     if key == 'p':
@@ -106,54 +275,28 @@ def process_input(key):
     if history_ui_active:
         return
         
-    # 获取当前控制的方块
-    current = None
-    for entity in scene.entities:
-        if isinstance(entity, Tetromino):
-            current = entity
-            break
-    
-    # 修改R键行为为重启整个程序（R键单独处理，不需要current存在）
+    # 修改R键行为为重启整个程序（R键单独处理，不需要当前方块存在）
     if key == 'r':
         print("重启程序...")
         restart_program()
         return
         
-    # 如果没有找到当前方块，跳过需要current的操作
-    if current is None:
+    # 回放时只响应相机、暂停和性能分析按键
+    if replay_player is not None:
+        return
+    
+    if key == 'b':
+        toggle_autoplay()
+        return
+        
+    # 如果没有当前方块，跳过游戏控制
+    if game_state.piece is None:
         print("警告: 没有找到当前控制的方块")
         return
     
-    # 移动控制
-    if key == 'left arrow' and current.move_cooldown <= 0:
-        current.move(dx=-1)
-        current.move_cooldown = 0.1
-    if key == 'right arrow' and current.move_cooldown <= 0:
-        current.move(dx=1)
-        current.move_cooldown = 0.1
-    if key == 'up arrow' and current.move_cooldown <= 0:
-        current.move(dz=1)
-        current.move_cooldown = 0.1
-    if key == 'down arrow' and current.move_cooldown <= 0:
-        current.move(dz=-1)
-        current.move_cooldown = 0.1
-    
-    # 旋转控制 - 三个轴的旋转
-    if key == 'w':  # X轴逆时针
-        current.rotate(axis='x')
-    if key == 's':  # X轴顺时针
-        current.rotate(axis='z')
-    if key == 'd':  # Z轴顺时针
-        current.rotate(axis='y', clockwise=False)
-    
-    # 加速下落
-    if key == 'space':
-        current.fall_speed = 20
-    elif current.fall_speed == 20:
-        current.fall_speed = 2
-    # 直接落地
-    if key == 'alt':
-        current.fall_speed = 100
+    # 移动、旋转和下落控制都交给GameState处理
+    game_state.apply_action(KEY_ACTIONS.get(key, 'none'))
+    apply_state_events()
 
 def restart_program():
     """完全重启整个程序，而不仅仅是重置游戏状态"""
@@ -170,7 +313,8 @@ def restart_program():
         print("正在重启游戏...")
         # 启动新进程
         
-        os.execl(python, python, script)
+        # 保留启动参数（网格尺寸、种子、出块方式、回放文件等）
+        os.execl(python, python, script, *sys.argv[1:])
         # 关闭当前程序
         application.quit()
         
@@ -0,0 +1,400 @@
+"""不依赖ursina的游戏核心
+
+GameState 持有棋盘、当前方块和下一个方块，负责移动、旋转、重力、落地、
+消层、计分和游戏结束判断。时间按固定的逻辑帧推进（TICK_RATE 帧/秒），
+同样的输入序列总是得到同样的结果，可以在没有显示器的机器上大批量模拟。
+
+方块序列来自 core.piece_source.PieceSource，可以选择均匀随机或7-bag出块，
+并预览之后的若干个方块。
+
+ursina 界面只是它的一个视图：每帧调用 tick(dt)，按键转换成 apply_action，
+再根据 pop_events() 返回的事件更新画面。一批事件可能跨越多个方块（硬降落地后
+生成下一个方块，甚至游戏结束），画面应以事件携带的数据为准，而不是读取
+事件处理时 GameState 的当前状态：
+
+    ('moved',)                          当前方块平移或下落了一格
+    ('rotated', kick)                   当前方块旋转，kick 为踢墙偏移
+    ('locked', shape_key, cells)        方块落地，cells 为落地的格子
+    ('cleared', layers)                 消除的层号
+    ('spawned', shape_key, piece, next_shape_key)  生成了新方块 piece
+    ('game_over',)
+"""
+from config.rules import GRID_WIDTH, GRID_HEIGHT, GRID_DEPTH, BOARD_BACKEND, PIECE_POLICY, shapes
+from core.bitboard import LayerOccupancy
+from core.piece_source import PieceSource
+from core.rotation_table import ORIENTATIONS, BOTTOMS, resolve_rotation
+from core.zobrist import mix
+
+# 逻辑帧率
+TICK_RATE = 60
+
+# 下落速度（格/秒）
+NORMAL_FALL_SPEED = 0.4
+SOFT_DROP_SPEED = 20
+RELEASED_FALL_SPEED = 2  # 加速下落后按下其他键时恢复到的速度
+
+# 两次平移之间的冷却帧数（0.1秒）
+MOVE_COOLDOWN_TICKS = 6
+
+# 每消除一层的得分
+LINE_SCORE = 100
+
+# 平移动作 {动作: (dx, dy, dz)}
+MOVE_ACTIONS = {
+    'left': (-1, 0, 0),
+    'right': (1, 0, 0),
+    'forward': (0, 0, 1),
+    'back': (0, 0, -1),
+}
+
+# 旋转动作 {动作: (axis, clockwise)}，与 W/D/S 键的旋转方式一致
+ROTATE_ACTIONS = {
+    'rotate_x': ('x', True),
+    'rotate_y': ('y', False),
+    'rotate_z': ('z', True),
+}
+
+# 形状键在校验值中的编号，不能用字符串的hash（每个进程不同）
+SHAPE_INDEX = {key: i + 1 for i, key in enumerate(shapes)}
+
+ACTIONS = ('none',) + tuple(MOVE_ACTIONS) + tuple(ROTATE_ACTIONS) + ('soft_drop', 'hard_drop')
+
+# 动作在回放文件中的编号，只能在末尾追加新动作，不能改变已有动作的顺序
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+
+def create_board(width=GRID_WIDTH, depth=GRID_DEPTH, height=GRID_HEIGHT, backend=BOARD_BACKEND):
+    """按配置创建棋盘存储后端，格子中保存的是方块的形状键"""
+    if backend == 'numpy':
+        from core.voxel_volume import VoxelVolume
+        return VoxelVolume(width, depth, height=height + 4)
+    return LayerOccupancy(width, depth)
+
+
+class Piece:
+    """活动方块：形状键、朝向下标和整数原点"""
+    __slots__ = ('shape_key', 'orientation', 'origin')
+
+    def __init__(self, shape_key, origin, orientation=0):
+        self.shape_key = shape_key
+        self.orientation = orientation
+        self.origin = origin
+
+    def offsets(self):
+        """当前朝向下各方块相对原点的整数偏移"""
+        return ORIENTATIONS[self.shape_key][self.orientation]
+
+    def cells(self):
+        """当前方块占据的网格坐标"""
+        ox, oy, oz = self.origin
+        return [(ox + dx, oy + dy, oz + dz) for dx, dy, dz in self.offsets()]
+
+
+class GameState:
+    """一局游戏的完整状态"""
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT, depth=GRID_DEPTH,
+                 seed=None, board=None, record_events=False, policy=PIECE_POLICY, lookahead=1):
+        """
+        Args:
+            width, height, depth: 网格尺寸，height 是生成高度
+            seed: 方块序列的随机种子
+            board: 使用已有的棋盘对象，为None时新建
+            record_events: 是否记录事件供界面读取
+            policy: 出块方式，'uniform' 或 'bag'
+            lookahead: 可以预览的方块数，至少为1（next_shape_key）
+        """
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.board = board if board is not None else create_board(width, depth, height)
+        self.record_events = record_events
+        self.pieces = PieceSource(seed, policy, max(1, lookahead))
+        self.recorder = None  # 录制动作的 core.replay.ReplayRecorder，不录制时为None
+        self.reset(seed)
+
+    @property
+    def seed(self):
+        """方块序列的随机种子"""
+        return self.pieces.seed
+
+    def reset(self, seed=None):
+        """清空棋盘并重新开始"""
+        self.pieces.reset(seed)
+        self.board.clear()
+        self.events = []
+        self.piece = None
+        self.next_shape_key = None
+        self.score = 0
+        self.lines_cleared = 0
+        self.pieces_placed = 0
+        self.game_over = False
+        self.tick_count = 0
+        self.fall_speed = NORMAL_FALL_SPEED
+        self.fall_ticks = 0
+        self.move_cooldown = 0
+        self._time_accumulator = 0.0
+
+    def _emit(self, *event):
+        if self.record_events:
+            self.events.append(event)
+
+    def pop_events(self):
+        """取出并清空自上次调用以来的事件"""
+        events = self.events
+        self.events = []
+        return events
+
+    def spawn_origin(self):
+        return (self.width // 2, self.height, self.depth // 2)
+
+    def spawn(self):
+        """在生成位置放出下一个方块；生成区已被占用时游戏结束
+
+        Returns:
+            Piece: 新的活动方块，游戏结束时为None
+        """
+        if self.board.max_height > self.height:
+            self._end_game()
+            return None
+
+        shape_key = self.pieces.next()
+        self.next_shape_key = self.pieces.peek(1)[0]
+        self.piece = Piece(shape_key, self.spawn_origin())
+        self.fall_speed = NORMAL_FALL_SPEED
+        self.fall_ticks = 0
+        self.move_cooldown = 0
+
+        if not self.fits():
+            self.piece = None
+            self._end_game()
+            return None
+        self._emit('spawned', shape_key, self.piece, self.next_shape_key)
+        return self.piece
+
+    def _end_game(self):
+        self.game_over = True
+        self._emit('game_over')
+
+    def preview(self):
+        """预览队列中之后的方块（lookahead 个），第0个即 next_shape_key"""
+        return self.pieces.peek()
+
+    def fits(self, dx=0, dy=0, dz=0, orientation=None):
+        """当前方块平移并取指定朝向后是否在界内且不与已有方块重叠"""
+        piece = self.piece
+        if orientation is None:
+            orientation = piece.orientation
+        ox, oy, oz = piece.origin
+        return self.board.fits((ox + dx, oy + dy, oz + dz), ORIENTATIONS[piece.shape_key][orientation])
+
+    def drop_distance(self):
+        """当前方块能够直接下落的格数"""
+        piece = self.piece
+        return self.board.drop_distance(piece.origin, BOTTOMS[piece.shape_key][piece.orientation])
+
+    def move(self, dx=0, dy=0, dz=0):
+        """平移当前方块；向下移动受阻时落地
+
+        Returns:
+            bool: 是否移动成功
+        """
+        if self.piece is None:
+            return False
+        if not self.fits(dx, dy, dz):
+            if dy < 0:
+                self.lock()
+            return False
+        ox, oy, oz = self.piece.origin
+        self.piece.origin = (ox + dx, oy + dy, oz + dz)
+        self._emit('moved')
+        return True
+
+    def rotate(self, axis='y', clockwise=True):
+        """按踢墙表旋转当前方块
+
+        Returns:
+            bool: 是否旋转成功
+        """
+        piece = self.piece
+        if piece is None:
+            return False
+        result = resolve_rotation(self.board, piece.shape_key, piece.orientation,
+                                  piece.origin, axis, clockwise)
+        if result is None:
+            return False
+        piece.orientation, kick = result
+        kx, ky, kz = kick
+        ox, oy, oz = piece.origin
+        piece.origin = (ox + kx, oy + ky, oz + kz)
+        self._emit('rotated', kick)
+        return True
+
+    def hard_drop(self):
+        """当前方块直接落到底并落地"""
+        if self.piece is None:
+            return
+        distance = self.drop_distance()
+        if distance:
+            ox, oy, oz = self.piece.origin
+            self.piece.origin = (ox, oy - distance, oz)
+            self._emit('moved')
+        self.lock()
+
+    def placements(self):
+        """当前方块在生成高度能够摆放的 (朝向, x, z) 组合"""
+        piece = self.piece
+        if piece is None:
+            return []
+        oy = self.spawn_origin()[1]
+        fits = self.board.fits
+        return [(orientation, x, z)
+                for orientation, offsets in enumerate(ORIENTATIONS[piece.shape_key])
+                for x in range(self.width)
+                for z in range(self.depth)
+                if fits((x, oy, z), offsets)]
+
+    def place(self, orientation, x, z):
+        """把当前方块转到指定朝向、移到生成高度的 (x, z) 后直接落地，供自动玩家使用
+
+        与 placements() 相同，落点总是从生成高度计算，方块已经下落了多少不影响结果。
+
+        Returns:
+            bool: 是否放置成功；该位置放不下时不改变状态
+        """
+        piece = self.piece
+        if piece is None:
+            return False
+        origin = (x, self.spawn_origin()[1], z)
+        if not self.board.fits(origin, ORIENTATIONS[piece.shape_key][orientation]):
+            return False
+        if self.recorder is not None:
+            self.recorder.place(self.tick_count, orientation, x, z)
+        piece.orientation = orientation
+        piece.origin = origin
+        self._emit('rotated', (0, 0, 0))
+        self.hard_drop()
+        return True
+
+    def lock(self):
+        """把当前方块固定到棋盘，处理消层、计分和游戏结束，然后生成下一个方块"""
+        piece = self.piece
+        cells = [(x, y, z) for x, y, z in piece.cells()
+                 if 0 <= x < self.width and y >= 0 and 0 <= z < self.depth]
+        for cell in cells:
+            self.board[cell] = piece.shape_key
+        self.piece = None
+        self.pieces_placed += 1
+        self._emit('locked', piece.shape_key, cells)
+
+        # 只检查方块所在的层
+        self.check_lines({y for _, y, _ in cells})
+
+        if self.board.max_height > self.height:
+            self._end_game()
+        else:
+            self.spawn()
+        if self.recorder is not None:
+            self.recorder.checkpoint(self.tick_count, self.checksum())
+
+    def check_lines(self, layers=None):
+        """消除填满的层并计分
+
+        Args:
+            layers: 只检查这些层；为None时检查所有层
+
+        Returns:
+            list: 被消除的层号（消除前的编号，升序）
+        """
+        full_layers = self.board.full_layers(layers)
+        if full_layers:
+            self.board.clear_layers(full_layers)
+            self.lines_cleared += len(full_layers)
+            self.score += LINE_SCORE * len(full_layers)
+            self._emit('cleared', full_layers)
+        return full_layers
+
+    def checksum(self):
+        """当前完整状态的64位校验值
+
+        由棋盘的 Zobrist 哈希混入当前方块、下一个方块、分数和帧数得到，
+        两边逐帧比较校验值即可找到回放或联机第一次出现分歧的帧。
+        """
+        piece = self.piece
+        if piece is None:
+            piece_state = (0, 0, 0, 0, 0)
+        else:
+            piece_state = (SHAPE_INDEX[piece.shape_key], piece.orientation) + piece.origin
+        return mix(self.board.zobrist, *piece_state,
+                   SHAPE_INDEX.get(self.next_shape_key, 0), self.score, self.tick_count, self.fall_ticks)
+
+    def apply_action(self, action):
+        """立即执行一个玩家动作，不推进时间
+
+        Args:
+            action: ACTIONS 中的一个
+        """
+        if self.game_over or self.piece is None:
+            return
+        if self.recorder is not None:
+            self.recorder.action(self.tick_count, ACTION_CODES[action])
+
+        if action in MOVE_ACTIONS:
+            if self.move_cooldown <= 0:
+                self.move(*MOVE_ACTIONS[action])
+                self.move_cooldown = MOVE_COOLDOWN_TICKS
+        elif action in ROTATE_ACTIONS:
+            self.rotate(*ROTATE_ACTIONS[action])
+
+        # 加速下落；加速状态下执行其他动作时恢复到较快的普通速度
+        if action == 'soft_drop':
+            self.fall_speed = SOFT_DROP_SPEED
+        elif self.fall_speed == SOFT_DROP_SPEED:
+            self.fall_speed = RELEASED_FALL_SPEED
+
+        if action == 'hard_drop':
+            self.hard_drop()
+
+    def _advance(self):
+        """推进一个逻辑帧：重力下落和平移冷却"""
+        self.tick_count += 1
+        if self.piece is None:
+            return
+        self.fall_ticks += 1
+        if self.fall_ticks >= TICK_RATE / self.fall_speed:
+            self.fall_ticks = 0
+            self.move(dy=-1)
+        if self.move_cooldown > 0:
+            self.move_cooldown -= 1
+
+    def advance(self, ticks=1):
+        """推进若干逻辑帧，不执行任何动作，供回放使用"""
+        for _ in range(ticks):
+            if self.game_over:
+                break
+            self._advance()
+
+    def step(self, action='none'):
+        """执行一个动作并推进一个逻辑帧
+
+        Returns:
+            bool: 游戏是否已经结束
+        """
+        self.apply_action(action)
+        if not self.game_over:
+            self._advance()
+        return self.game_over
+
+    def tick(self, dt):
+        """按真实经过的时间推进若干逻辑帧
+
+        Returns:
+            int: 本次推进的逻辑帧数
+        """
+        self._time_accumulator += dt
+        ticks = 0
+        while self._time_accumulator >= 1.0 / TICK_RATE and not self.game_over:
+            self._time_accumulator -= 1.0 / TICK_RATE
+            self._advance()
+            ticks += 1
+        return ticks
@@ -0,0 +1,152 @@
+"""已放置方块的暴露面生成（不依赖ursina）
+
+按层生成已放置方块暴露在外的面（相邻格有方块的面被剔除）的顶点数据。剔除用整层的
+占用位掩码移位完成，不逐格查询棋盘；每层可以再按 CHUNK_SIZE×CHUNK_SIZE 列分块生成，
+方块落地时只需重建受影响的块。
+
+画面中的网格实体见 core.voxel_mesher，基准测试可以直接使用本模块测量生成耗时。
+"""
+# 六个方向的面：法线方向和面的四个角（相对格子中心）
+FACES = (
+    ((1, 0, 0), ((0.5, -0.5, -0.5), (0.5, 0.5, -0.5), (0.5, 0.5, 0.5), (0.5, -0.5, 0.5))),
+    ((-1, 0, 0), ((-0.5, -0.5, 0.5), (-0.5, 0.5, 0.5), (-0.5, 0.5, -0.5), (-0.5, -0.5, -0.5))),
+    ((0, 1, 0), ((-0.5, 0.5, -0.5), (-0.5, 0.5, 0.5), (0.5, 0.5, 0.5), (0.5, 0.5, -0.5))),
+    ((0, -1, 0), ((-0.5, -0.5, 0.5), (-0.5, -0.5, -0.5), (0.5, -0.5, -0.5), (0.5, -0.5, 0.5))),
+    ((0, 0, 1), ((0.5, -0.5, 0.5), (0.5, 0.5, 0.5), (-0.5, 0.5, 0.5), (-0.5, -0.5, 0.5))),
+    ((0, 0, -1), ((-0.5, -0.5, -0.5), (-0.5, 0.5, -0.5), (0.5, 0.5, -0.5), (0.5, -0.5, -0.5))),
+)
+FACE_UVS = ((0, 0), (0, 1), (1, 1), (1, 0))
+
+# 每层网格按 CHUNK_SIZE×CHUNK_SIZE 列分块，默认的小网格每层只有一块
+CHUNK_SIZE = 16
+
+# 每个字节中被置位的位号，用于快速列出掩码中的格子
+_BYTE_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+
+# 不同宽度和深度下 x = width-1 与 x = 0 两列格子的掩码 {(width, depth): (last_x, first_x)}
+_edge_masks = {}
+
+
+def set_bits(mask):
+    """掩码中所有被置位的位号（升序）"""
+    bits = []
+    for offset, byte in enumerate(mask.to_bytes((mask.bit_length() + 7) // 8, 'little')):
+        if byte:
+            base = offset * 8
+            bits += [base + bit for bit in _BYTE_BITS[byte]]
+    return bits
+
+
+def edge_masks(width, depth):
+    key = (width, depth)
+    if key not in _edge_masks:
+        last_x = first_x = 0
+        for z in range(depth):
+            last_x |= 1 << (width - 1 + z * width)
+            first_x |= 1 << (z * width)
+        _edge_masks[key] = (last_x, first_x)
+    return _edge_masks[key]
+
+
+def exposed_masks(board, y):
+    """某层在 FACES 六个方向上暴露的格子掩码
+
+    同层相邻格的遮挡通过整层掩码移位得到，上下两层直接取相邻层的掩码，
+    每层只需常数次大整数运算，不必逐格查询棋盘。
+    """
+    layer = board.layer_mask(y)
+    if not layer:
+        return None
+    width = board.width
+    last_x, first_x = edge_masks(width, board.depth)
+    above = board.layer_mask(y + 1)
+    below = board.layer_mask(y - 1) if y > 0 else 0
+    return (
+        layer & ~((layer >> 1) & ~last_x),    # +x：右侧格，最后一列没有右侧格
+        layer & ~((layer << 1) & ~first_x),   # -x：左侧格，第一列没有左侧格
+        layer & ~above,
+        layer & ~below,
+        layer & ~(layer >> width),            # +z
+        layer & ~(layer << width),            # -z
+    )
+
+
+def build_layer_faces(board, y, palette, region=None):
+    """生成某层所有暴露面的网格数据
+
+    Args:
+        board: 棋盘占用网格（LayerOccupancy 或 VoxelVolume，需要提供 layer_mask）
+        y: 层号
+        palette: 形状键到颜色的映射
+        region: 只生成这些格子（同层掩码）的面，为None时生成整层
+
+    Returns:
+        tuple: (vertices, triangles, colors, uvs, normals)，坐标相对于该层的网格原点
+    """
+    vertices = []
+    triangles = []
+    colors = []
+    uvs = []
+    normals = []
+    exposed = exposed_masks(board, y)
+    if exposed is None:
+        return vertices, triangles, colors, uvs, normals
+
+    width = board.width
+    cell_colors = {}  # 每格颜色只查询一次
+    for (normal, corners), mask in zip(FACES, exposed):
+        if region is not None:
+            mask &= region
+        normal_run = (normal,) * 4
+        for index in set_bits(mask):
+            x, z = index % width, index // width
+            block_color = cell_colors.get(index)
+            if block_color is None:
+                block_color = cell_colors[index] = palette[board.get((x, y, z))]
+            start = len(vertices)
+            vertices += [(x + cx, cy, z + cz) for cx, cy, cz in corners]
+            colors += (block_color,) * 4
+            uvs += FACE_UVS
+            normals += normal_run
+            triangles += (start, start + 1, start + 2, start, start + 2, start + 3)
+    return vertices, triangles, colors, uvs, normals
+
+
+def chunk_mask(width, depth, chunk):
+    """一个分块内所有格子的同层掩码
+
+    Args:
+        chunk: 分块坐标 (x // CHUNK_SIZE, z // CHUNK_SIZE)
+    """
+    cx, cz = chunk
+    x0, z0 = cx * CHUNK_SIZE, cz * CHUNK_SIZE
+    row = ((1 << min(CHUNK_SIZE, width - x0)) - 1) << x0
+    mask = 0
+    for z in range(z0, min(z0 + CHUNK_SIZE, depth)):
+        mask |= row << (z * width)
+    return mask
+
+
+def touched_chunks(cells, width, depth):
+    """方块落地后需要重建的 (层号, 分块)
+
+    所在层及上下相邻层中同一列的遮挡关系会变化；同层的相邻格可能在旁边的分块中，
+    也需要重建。
+    """
+    touched = set()
+    for x, y, z in cells:
+        chunk = (x // CHUNK_SIZE, z // CHUNK_SIZE)
+        for layer in (y - 1, y + 1):
+            if layer >= 0:
+                touched.add((layer, chunk))
+        for nx, nz in ((x, z), (x - 1, z), (x + 1, z), (x, z - 1), (x, z + 1)):
+            if 0 <= nx < width and 0 <= nz < depth:
+                touched.add((y, (nx // CHUNK_SIZE, nz // CHUNK_SIZE)))
+    return touched
+
+
+def layer_chunks(width, depth):
+    """一层的所有分块坐标"""
+    return [(cx, cz)
+            for cz in range((depth + CHUNK_SIZE - 1) // CHUNK_SIZE)
+            for cx in range((width + CHUNK_SIZE - 1) // CHUNK_SIZE)]
@@ -0,0 +1,98 @@
+"""可复现的方块序列
+
+PieceSource 按固定种子生成方块序列，并维护一个预览队列：
+
+    pieces = PieceSource(seed=42, policy='bag', lookahead=3)
+    pieces.next()      # 取出下一个方块
+    pieces.peek()      # 之后的 lookahead 个方块，不取出
+
+两种出块方式：
+    uniform  每次从所有形状中均匀随机选择
+    bag      每次把所有形状打乱成一袋依次发出，发完再换一袋（7-bag），
+             任意连续两袋之间同一形状最多相隔 2×7-2 个方块
+
+同样的种子和方式总是得到同样的序列，与预览长度无关，GameState、BatchEnv、
+回放、基准测试和自动玩家评估只要使用相同的种子，方块序列就完全相同。
+"""
+import random
+from collections import deque
+
+from config.rules import shapes
+
+POLICIES = ('uniform', 'bag')
+
+# 形状键只生成一次，不必每次出块都重新构造列表
+SHAPE_KEYS = tuple(shapes)
+
+
+class PieceSource:
+    """带预览队列的种子化方块序列"""
+
+    def __init__(self, seed=None, policy='uniform', lookahead=1, shape_keys=SHAPE_KEYS):
+        """
+        Args:
+            seed: 随机种子，为None时随机选择一个
+            policy: 'uniform' 或 'bag'
+            lookahead: 预览队列长度
+            shape_keys: 参与出块的形状
+        """
+        if policy not in POLICIES:
+            raise ValueError(f"未知的出块方式: {policy}，可选: {', '.join(POLICIES)}")
+        if lookahead < 0:
+            raise ValueError(f"预览长度不能为负数: {lookahead}")
+        self.policy = policy
+        self.lookahead = lookahead
+        self.shape_keys = tuple(shape_keys)
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """按新的种子从头开始
+
+        Args:
+            seed: 为None时随机选择一个种子并记录在 self.seed 中，这一局同样可以复现
+        """
+        if seed is None:
+            seed = random.randrange(1 << 32)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.bag = []
+        self.queue = deque()
+        self.count = 0  # 已经取出的方块数
+
+    def _draw(self):
+        if self.policy == 'bag':
+            if not self.bag:
+                self.bag = list(self.shape_keys)
+                self.rng.shuffle(self.bag)
+            return self.bag.pop()
+        return self.rng.choice(self.shape_keys)
+
+    def _fill(self, size):
+        while len(self.queue) < size:
+            self.queue.append(self._draw())
+
+    def next(self):
+        """取出下一个方块"""
+        self._fill(1)
+        self.count += 1
+        return self.queue.popleft()
+
+    def peek(self, count=None):
+        """之后的若干个方块（默认 lookahead 个），不改变序列
+
+        Returns:
+            list: 形状键，第0个是下一次 next() 返回的方块
+        """
+        if count is None:
+            count = self.lookahead
+        self._fill(count)
+        return list(self.queue)[:count]
+
+    def take(self, count):
+        """连续取出若干个方块，供批量环境和求解器等一次需要整段序列的地方使用"""
+        queued = min(count, len(self.queue))
+        pieces = [self.queue.popleft() for _ in range(queued)]
+        draw = self._draw
+        pieces += [draw() for _ in range(count - queued)]
+        self.count += count
+        return pieces
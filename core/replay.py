@@ -0,0 +1,333 @@
+"""紧凑的二进制输入录制与确定性回放
+
+GameState 的结果只取决于方块序列的种子、网格尺寸和每个动作发生在第几帧，
+所以录制这些就能完整重建一局游戏。文件格式（整数都是 LEB128 变长编码）：
+
+    文件头  'T3DR' 版本 种子(zigzag) 出块方式 宽 高 深 帧率
+    记录    距上一条记录的帧数 类型 [参数...]
+
+记录类型：
+    0..N-1     GameState.ACTIONS 中的动作（按键）
+    PLACE      自动玩家的直接放置，参数为 朝向 x z
+    CHECK      方块落地后的状态校验值低32位
+    END        录制结束，参数为完整的64位校验值
+
+一次按键只占两个字节左右，一整局通常只有几KB。录制时只是往 bytearray 末尾追加
+几个字节，不影响帧时间。
+
+回放时按记录的帧号推进 GameState 并执行同样的动作，同时重新录制一份：
+两份记录完全相同说明回放与原局一致，不同时用 first_divergence 找到第一个
+不一致的落地校验点。
+
+本模块在导入时不导入 core.game_state（它在导入时按当时的网格尺寸取默认值），
+main.py 可以先读取回放文件头，按其中的网格尺寸完成配置后再导入其他模块。
+"""
+from core.zobrist import first_divergence
+
+MAGIC = b'T3DR'
+VERSION = 2  # 2: 重力在第 TICK_RATE / 速度 帧下落，与版本1的帧号不同
+
+# 出块方式在文件中的编号
+POLICY_CODES = {'uniform': 0, 'bag': 1}
+
+# 动作以外的记录类型，与动作编号（0开始）错开
+PLACE = 0x40
+CHECK = 0x41
+END = 0x42
+
+CHECK_MASK = (1 << 32) - 1
+
+# 回放文件的扩展名
+EXTENSION = '.t3dr'
+
+
+def write_varint(out, value):
+    """把非负整数按 LEB128 追加到 bytearray"""
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(data, pos):
+    """从 pos 处读取一个 LEB128 整数
+
+    Returns:
+        tuple: (数值, 下一个位置)
+    """
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ValueError("回放文件不完整")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def zigzag(value):
+    """有符号整数映射为非负整数，绝对值小的数编码短"""
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+
+class ReplayRecorder:
+    """录制一局游戏，设为 GameState.recorder 后自动记录动作、放置和落地校验值"""
+
+    def __init__(self, seed, policy, width, height, depth, tick_rate):
+        self.data = bytearray(MAGIC)
+        self.data.append(VERSION)
+        write_varint(self.data, zigzag(seed))
+        write_varint(self.data, POLICY_CODES[policy])
+        for value in (width, height, depth, tick_rate):
+            write_varint(self.data, value)
+        self.last_tick = 0
+        self.finished = False
+
+    @classmethod
+    def for_state(cls, state):
+        """按 GameState 当前的种子和配置开始录制，并挂到 state 上"""
+        from core.game_state import TICK_RATE
+        recorder = cls(state.seed, state.pieces.policy, state.width, state.height, state.depth, TICK_RATE)
+        state.recorder = recorder
+        return recorder
+
+    def _record(self, tick, kind):
+        write_varint(self.data, tick - self.last_tick)
+        self.data.append(kind)
+        self.last_tick = tick
+
+    def action(self, tick, code):
+        """记录一个动作，code 为 ACTION_CODES 中的编号"""
+        self._record(tick, code)
+
+    def place(self, tick, orientation, x, z):
+        """记录一次直接放置"""
+        self._record(tick, PLACE)
+        write_varint(self.data, orientation)
+        write_varint(self.data, x)
+        write_varint(self.data, z)
+
+    def checkpoint(self, tick, checksum):
+        """记录方块落地后的状态校验值"""
+        self._record(tick, CHECK)
+        write_varint(self.data, checksum & CHECK_MASK)
+
+    def finish(self, tick, checksum):
+        """结束录制
+
+        Returns:
+            bytes: 完整的回放数据
+        """
+        if not self.finished:
+            self._record(tick, END)
+            write_varint(self.data, checksum)
+            self.finished = True
+        return bytes(self.data)
+
+    def save(self, path, state):
+        """结束录制并写入文件"""
+        data = self.finish(state.tick_count, state.checksum())
+        with open(path, 'wb') as f:
+            f.write(data)
+        return len(data)
+
+
+class Replay:
+    """解析后的回放数据"""
+
+    def __init__(self, seed, policy, width, height, depth, tick_rate, records, end):
+        """
+        Args:
+            records: [(帧号, 类型, 参数元组), ...]
+            end: (结束帧号, 64位校验值)，录制没有正常结束时为None
+        """
+        self.seed = seed
+        self.policy = policy
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.tick_rate = tick_rate
+        self.records = records
+        self.end = end
+
+    @property
+    def checkpoints(self):
+        """落地校验值 [(帧号, 校验值), ...]"""
+        return [(tick, args[0]) for tick, kind, args in self.records if kind == CHECK]
+
+    @property
+    def ticks(self):
+        if self.end is not None:
+            return self.end[0]
+        return self.records[-1][0] if self.records else 0
+
+
+def parse_header(data):
+    """解析文件头
+
+    Returns:
+        tuple: (seed, policy, width, height, depth, tick_rate, 记录开始的位置)
+    """
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("不是回放文件")
+    pos = len(MAGIC)
+    if pos >= len(data):
+        raise ValueError("回放文件不完整")
+    version = data[pos]
+    if version != VERSION:
+        raise ValueError(f"不支持的回放文件版本: {version}")
+    pos += 1
+    seed, pos = read_varint(data, pos)
+    policy_code, pos = read_varint(data, pos)
+    policies = {code: name for name, code in POLICY_CODES.items()}
+    if policy_code not in policies:
+        raise ValueError(f"未知的出块方式编号: {policy_code}")
+    values = []
+    for _ in range(4):
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return (unzigzag(seed), policies[policy_code], *values, pos)
+
+
+def parse(data):
+    """解析回放数据"""
+    *header, pos = parse_header(data)
+    records = []
+    end = None
+    tick = 0
+    while pos < len(data):
+        delta, pos = read_varint(data, pos)
+        tick += delta
+        if pos >= len(data):
+            raise ValueError("回放文件不完整")
+        kind = data[pos]
+        pos += 1
+        if kind == PLACE:
+            args = []
+            for _ in range(3):
+                value, pos = read_varint(data, pos)
+                args.append(value)
+            records.append((tick, kind, tuple(args)))
+        elif kind == CHECK:
+            checksum, pos = read_varint(data, pos)
+            records.append((tick, kind, (checksum,)))
+        elif kind == END:
+            checksum, pos = read_varint(data, pos)
+            end = (tick, checksum)
+            break
+        else:
+            records.append((tick, kind, ()))
+    return Replay(*header, records, end)
+
+
+def load(path):
+    """读取回放文件"""
+    with open(path, 'rb') as f:
+        return parse(f.read())
+
+
+def read_config(path):
+    """只读取回放文件的种子和网格配置，不导入游戏模块
+
+    Returns:
+        dict: seed, policy, width, height, depth, tick_rate
+    """
+    with open(path, 'rb') as f:
+        seed, policy, width, height, depth, tick_rate, _ = parse_header(f.read(64))
+    return {'seed': seed, 'policy': policy, 'width': width, 'height': height,
+            'depth': depth, 'tick_rate': tick_rate}
+
+
+class ReplayPlayer:
+    """按记录的帧号驱动 GameState 重放一局游戏"""
+
+    def __init__(self, replay, state=None):
+        """
+        Args:
+            replay: Replay 对象
+            state: 使用已有的 GameState（如界面中的），为None时新建无界面的
+        """
+        from core.game_state import GameState, ACTIONS, TICK_RATE
+        if replay.tick_rate != TICK_RATE:
+            raise ValueError(f"回放的帧率 {replay.tick_rate} 与当前的 {TICK_RATE} 不同")
+        self.actions = ACTIONS
+        self.replay = replay
+        if state is None:
+            state = GameState(replay.width, replay.height, replay.depth, policy=replay.policy)
+        elif (state.width, state.height, state.depth) != (replay.width, replay.height, replay.depth):
+            raise ValueError("回放的网格尺寸与当前游戏不同")
+        self.state = state
+        self.index = 0
+        self.records = [record for record in replay.records if record[1] != CHECK]
+
+        # 从同样的种子重新开始，重新录制一份用于校验
+        state.pieces.policy = replay.policy
+        state.reset(replay.seed)
+        self.recorder = ReplayRecorder.for_state(state)
+        state.spawn()
+
+    @property
+    def finished(self):
+        return self.state.game_over or (self.index >= len(self.records)
+                                        and self.state.tick_count >= self.replay.ticks)
+
+    def _apply_due(self):
+        """执行所有发生在当前帧的记录"""
+        state = self.state
+        records = self.records
+        while self.index < len(records) and records[self.index][0] <= state.tick_count:
+            _, kind, args = records[self.index]
+            self.index += 1
+            if kind == PLACE:
+                state.place(*args)
+            elif kind < len(self.actions):
+                state.apply_action(self.actions[kind])
+
+    def advance(self, ticks):
+        """推进至多 ticks 个逻辑帧
+
+        Returns:
+            int: 实际推进的帧数
+        """
+        state = self.state
+        advanced = 0
+        while advanced < ticks and not self.finished:
+            self._apply_due()
+            if state.tick_count >= self.replay.ticks or state.game_over:
+                break
+            state.advance()
+            advanced += 1
+        self._apply_due()
+        return advanced
+
+    def run(self):
+        """一直回放到结束"""
+        while not self.finished:
+            if not self.advance(1 << 20):
+                break
+        return self.state
+
+    def verify(self):
+        """比较回放过程重新录制的校验值与原来的记录
+
+        Returns:
+            tuple: (是否一致, 第一个不一致的落地校验点的帧号，一致时为None)
+        """
+        state = self.state
+        replayed = parse(self.recorder.finish(state.tick_count, state.checksum()))
+        original = [checksum for _, checksum in self.replay.checkpoints]
+        again = [checksum for _, checksum in replayed.checkpoints]
+        index = first_divergence(original, again)
+        if index is not None:
+            checkpoints = self.replay.checkpoints or replayed.checkpoints
+            return False, checkpoints[min(index, len(checkpoints) - 1)][0]
+        if self.replay.end is not None and replayed.end != self.replay.end:
+            return False, self.replay.end[0]
+        return True, None
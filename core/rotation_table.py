@@ -0,0 +1,133 @@
+"""方块朝向表与踢墙表
+
+导入时为 config.shapes 中的每种形状预先计算完整的旋转群（最多24种朝向），
+每种朝向保存为整数偏移元组，并记录绕各轴旋转90度后得到的朝向下标。
+活动方块只需保存朝向下标和整数原点，碰撞检测全部是整数查表。
+
+踢墙表为每个（形状, 朝向, 轴, 方向）列出旋转后依次尝试的位移及对应的
+方块偏移，旋转时交给棋盘一次性找出第一个可放下的候选。
+
+旋转方向与ursina一致：从轴的正方向往回看时，正角度为顺时针。
+"""
+from config.rules import shapes
+
+AXES = ('x', 'y', 'z')
+
+# 旋转碰撞时依次尝试的位移：先原地，再水平偏移，最后上下偏移
+KICK_OFFSETS = {
+    'x': ((0, 0, 0), (0, 0, 1), (0, 0, -1), (1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0)),
+    'y': ((0, 0, 0), (1, 0, 0), (-1, 0, 0), (0, 0, 1), (0, 0, -1), (0, 1, 0), (0, -1, 0)),
+    'z': ((0, 0, 0), (1, 0, 0), (-1, 0, 0), (0, 0, 1), (0, 0, -1), (0, 1, 0), (0, -1, 0)),
+}
+
+
+def rotate_offset(offset, axis, clockwise=True):
+    """将一个整数偏移绕指定轴旋转90度"""
+    x, y, z = offset
+    if axis == 'x':
+        return (x, -z, y) if clockwise else (x, z, -y)
+    if axis == 'y':
+        return (z, y, -x) if clockwise else (-z, y, x)
+    if axis == 'z':
+        return (y, -x, z) if clockwise else (-y, x, z)
+    raise ValueError(f"未知的旋转轴: {axis}")
+
+
+def build_orientations(base_offsets):
+    """从初始偏移出发，广度优先枚举所有可达朝向
+
+    Args:
+        base_offsets: 形状的初始方块偏移列表
+
+    Returns:
+        tuple: (朝向列表, 旋转转移表)。朝向列表中每项是偏移元组；
+               转移表第 i 项为 {(axis, clockwise): 旋转后的朝向下标}
+    """
+    orientations = [tuple(tuple(offset) for offset in base_offsets)]
+    index_of = {frozenset(orientations[0]): 0}
+    transitions = []
+
+    i = 0
+    while i < len(orientations):
+        moves = {}
+        for axis in AXES:
+            for clockwise in (True, False):
+                rotated = tuple(rotate_offset(offset, axis, clockwise) for offset in orientations[i])
+                key = frozenset(rotated)
+                if key not in index_of:
+                    index_of[key] = len(orientations)
+                    orientations.append(rotated)
+                moves[(axis, clockwise)] = index_of[key]
+        transitions.append(moves)
+        i += 1
+
+    return orientations, transitions
+
+
+def build_bottoms(orientations):
+    """求出每个朝向在各列最低的方块偏移，用于直接计算下落距离"""
+    bottoms = []
+    for offsets in orientations:
+        lowest = {}
+        for bx, by, bz in offsets:
+            if (bx, bz) not in lowest or by < lowest[(bx, bz)]:
+                lowest[(bx, bz)] = by
+        bottoms.append(tuple((bx, by, bz) for (bx, bz), by in lowest.items()))
+    return bottoms
+
+
+def build_kicks(orientations, transitions):
+    """为每个朝向和旋转方向生成踢墙候选
+
+    Returns:
+        list: 第 i 项为 {(axis, clockwise): (目标朝向, 位移元组, 候选偏移元组)}，
+              候选偏移是目标朝向的偏移加上对应位移后的结果
+    """
+    kicks = []
+    for moves in transitions:
+        entries = {}
+        for (axis, clockwise), target in moves.items():
+            offsets = KICK_OFFSETS[axis]
+            candidates = tuple(
+                tuple((bx + kx, by + ky, bz + kz) for bx, by, bz in orientations[target])
+                for kx, ky, kz in offsets
+            )
+            entries[(axis, clockwise)] = (target, offsets, candidates)
+        kicks.append(entries)
+    return kicks
+
+
+# 每种形状的全部朝向 {shape_key: [((dx, dy, dz), ...), ...]}
+ORIENTATIONS = {}
+# 每种形状的旋转转移表 {shape_key: [{(axis, clockwise): orientation}, ...]}
+ROTATIONS = {}
+# 每种形状各朝向的底部轮廓 {shape_key: [((dx, 最低dy, dz), ...), ...]}
+BOTTOMS = {}
+# 每种形状的踢墙表 {shape_key: [{(axis, clockwise): (target, kicks, candidates)}, ...]}
+KICK_TABLE = {}
+
+for _key, _shape in shapes.items():
+    ORIENTATIONS[_key], ROTATIONS[_key] = build_orientations(_shape[0])
+    BOTTOMS[_key] = build_bottoms(ORIENTATIONS[_key])
+    KICK_TABLE[_key] = build_kicks(ORIENTATIONS[_key], ROTATIONS[_key])
+
+
+def resolve_rotation(board, shape_key, orientation, origin, axis, clockwise=True):
+    """查踢墙表求出旋转结果
+
+    Args:
+        board: 棋盘占用网格
+        shape_key: 形状键
+        orientation: 当前朝向下标
+        origin: 当前整数原点 (x, y, z)
+        axis: 旋转轴
+        clockwise: 是否顺时针
+
+    Returns:
+        tuple: 成功时为 (新朝向, 使用的位移)，所有候选都放不下时为 None
+    """
+    target, kicks, candidates = KICK_TABLE[shape_key][orientation][(axis, clockwise)]
+    index = board.first_fit(origin, candidates)
+    if index < 0:
+        return None
+    return target, kicks[index]
@@ -0,0 +1,461 @@
+"""全消与谜题求解器
+
+给定一个棋盘和已知的方块序列，搜索每个方块的落点：
+- 'perfect' 模式寻找把棋盘完全消空的落点序列（可以只用序列的前若干个方块）；
+- 'lines' 模式寻找整个序列消除层数最多的落点序列。
+
+落点与自动玩家相同，是 (朝向, x, z) 后从上方直接落下，朝向来自旋转表，
+可以直接交给 GameState.place 复现。搜索是深度优先，棋盘只用每列的位掩码表示：
+- 置换表记录已经搜索过的状态，相同的棋盘在同一序列位置只搜索一次；
+- 全消模式依次尝试每个可能的目标层数：格子总数必须正好凑满这么多层，
+  方块也不能超出还要消除的层数。先做快速搜索，只考虑不产生空洞的落点，
+  大多数有解的问题在这一步就能找到；找不到时再允许空洞搜索一遍，被覆盖的
+  空格在上方的层消除后会重新露出来，仍然可以填上；
+- 消层模式从上界开始逐个降低目标层数，搜索能否达到目标；剩余方块最多还能
+  消除的层数按各层缺少的格子数估计，达不到目标的分支直接放弃；
+- workers 大于1时把第一个方块的各个落点按顺序分给多个进程并行搜索，
+  结果与单进程搜索相同。每个进程在整次求解中保留同一个求解器和置换表，
+  但进程之间不共享置换表，不同子树中重复出现的棋盘会在各进程中各搜索一次，
+  进程间通信也有固定开销。因此并行只在多核机器上、单进程需要数秒以上的
+  大搜索（较长的序列、无解的全消问题）时才更快；小问题和单核机器应使用默认的
+  单进程搜索。
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from core.autoplay import placement_table, drop_cells, place_cells
+from core.rotation_table import ORIENTATIONS
+
+MODES = ('perfect', 'lines')
+
+
+def popcount(value):
+    return bin(value).count('1')
+
+
+def board_symmetries(width, depth):
+    """棋盘的对称变换，以列下标的排列表示
+
+    包括 x、z 方向的镜像，宽深相等时还包括 x、z 互换。只保留所有形状的朝向集合
+    在变换下保持不变的对称，这样对称的棋盘搜索结果相同，置换表只需记录一个。
+    """
+    def normalize(cells):
+        mx = min(x for x, _, _ in cells)
+        my = min(y for _, y, _ in cells)
+        mz = min(z for _, _, z in cells)
+        return frozenset((x - mx, y - my, z - mz) for x, y, z in cells)
+
+    transforms = [lambda x, z: (x, z), lambda x, z: (width - 1 - x, z),
+                  lambda x, z: (x, depth - 1 - z), lambda x, z: (width - 1 - x, depth - 1 - z)]
+    if width == depth:
+        transforms += [lambda x, z: (z, x), lambda x, z: (width - 1 - z, x),
+                       lambda x, z: (z, depth - 1 - x), lambda x, z: (width - 1 - z, depth - 1 - x)]
+
+    symmetries = []
+    for transform in transforms:
+        # 用单位偏移检查形状的朝向集合在变换下是否不变
+        def apply(cells):
+            return normalize([transform(x, z)[0:1] + (y,) + transform(x, z)[1:] for x, y, z in cells])
+        if all({apply(offsets) for offsets in orientations} <= {normalize(offsets) for offsets in orientations}
+               for orientations in ORIENTATIONS.values()):
+            permutation = [0] * (width * depth)
+            for x in range(width):
+                for z in range(depth):
+                    tx, tz = transform(x, z)
+                    permutation[tx + tz * width] = x + z * width
+            symmetries.append(tuple(permutation))
+    return symmetries
+
+
+class Solver:
+    """单进程的深度优先求解器"""
+
+    def __init__(self, width, depth, height, sequence):
+        """
+        Args:
+            width, depth: 网格尺寸
+            height: 允许堆叠的最高层数，超过视为失败
+            sequence: 方块形状键序列
+        """
+        self.width = width
+        self.depth = depth
+        self.height = height
+        self.area = width * depth
+        self.sequence = list(sequence)
+        self.table = placement_table(width, depth)
+        # 每个落点各列的最低格 (列下标, dy) 和最高格的 dy，用于直接算出落地高度
+        self.entries = {}
+        for shape_key, entries in self.table.items():
+            self.entries[shape_key] = []
+            for placement, cells in entries:
+                bottoms = {}
+                for column, dy in cells:
+                    bottoms[column] = min(dy, bottoms.get(column, dy))
+                self.entries[shape_key].append((placement, cells, tuple(bottoms.items()),
+                                                max(dy for _, dy in cells)))
+        # 从所有方块之上落下，方块偏移最低为-2
+        self.drop_height = height + 3
+        self.symmetries = board_symmetries(width, depth)
+        # 每层计数字段的位宽，足够存放一层的全部格子数；spread 把8层的位展开成8个字段
+        self.field = self.area.bit_length()
+        self.spread = [sum(1 << (self.field * y) for y in range(8) if byte >> y & 1) for byte in range(256)]
+        self.failed = set()  # 全消模式中确认无解的 (棋盘, 序列位置, 目标高度)
+        self.unreachable = {}  # 消层模式 {(棋盘, 序列位置, 是否只用无空洞落点): 已知达不到的最少层数}
+        self.nodes = 0
+
+    def canonical(self, columns):
+        """棋盘在所有对称变换下字典序最小的列掩码，用作置换表的键"""
+        get = columns.__getitem__
+        return min(tuple(map(get, permutation)) for permutation in self.symmetries)
+
+    def children(self, columns, index, cap, strict=False):
+        """第 index 个方块不超过 cap 层的所有不同落点
+
+        Args:
+            strict: 是否只保留不产生空洞的落点
+
+        Returns:
+            list: [(落点, 新列掩码, 消除层数, 新增空洞数)]，消层多、空洞少、落点低的排在前面
+        """
+        heights = [column.bit_length() for column in columns]
+        results = []
+        for placement, cells, bottoms, top_offset in self.entries[self.sequence[index]]:
+            # 从上方落下时原点停在各列要求的最高处
+            landing = max(heights[column] - dy for column, dy in bottoms)
+            if landing + top_offset >= cap:
+                continue
+            # 每列最低的落地格与原来的列高之间的空格都成为空洞
+            holes = sum(landing + dy - heights[column] for column, dy in bottoms)
+            if strict and holes:
+                continue
+            landed = tuple((column, landing + dy) for column, dy in cells)
+            placed, lines = place_cells(columns, landed)
+            results.append((placement, tuple(placed), lines, holes, sum(y for _, y in landed)))
+        results.sort(key=lambda child: (-child[2], child[3], child[4]))
+        return [child[:4] for child in results]
+
+    def perfect(self, columns, index, cap, cleared=0, strict=True):
+        """搜索再消除 cap 层后正好全消的落点序列
+
+        Args:
+            strict: 为True时只考虑不产生空洞的落点；为False时允许空洞，
+                    被覆盖的空格在上方的层消除后还可以填上
+
+        方块总是不超出 cap 层：堆叠高度以下的每一层都有方块，都必须消除，
+        所以堆叠高度不可能超过还要消除的层数。
+
+        Returns:
+            list: 从第 index 个方块开始的落点序列，找不到时返回None
+        """
+        self.nodes += 1
+        if cleared and not any(columns):
+            return []
+        remaining = len(self.sequence) - index
+        key = (self.canonical(columns), index, cap, strict)
+        if remaining == 0 or key in self.failed:
+            return None
+
+        # 剩余方块必须正好填满目标高度以下的空格
+        missing = cap * self.area - sum(popcount(column) for column in columns)
+        if missing <= 0 or missing % 4 or missing // 4 > remaining:
+            self.failed.add(key)
+            return None
+        # 有空洞时，剩余方块最多能消除的层数（考虑压在空洞上方必须先消除的层）还要够用
+        if not strict and self.lines_bound(columns, remaining) < cap:
+            self.failed.add(key)
+            return None
+
+        limit = cap if strict else min(cap, self.height)
+        for placement, placed, lines, _ in self.children(columns, index, limit, strict):
+            rest = self.perfect(placed, index + 1, cap - lines, cleared + lines, strict)
+            if rest is not None:
+                return [placement] + rest
+
+        self.failed.add(key)
+        return None
+
+    def perfect_caps(self, columns, index=0, strict=True):
+        """全消可能的目标层数，从低到高
+
+        目标至少是现有的堆叠高度。不允许空洞时最多是 height；允许空洞时消除的层
+        可以由后来的方块重新堆起，层数只受剩余方块的格子数限制。
+        """
+        cells = sum(popcount(column) for column in columns)
+        highest = self.height if strict else None
+        remaining = len(self.sequence) - index
+        caps = []
+        cap = max(max(column.bit_length() for column in columns), 1)
+        while highest is None or cap <= highest:
+            missing = cap * self.area - cells
+            if missing > 4 * remaining:
+                break
+            if missing > 0 and missing % 4 == 0:
+                caps.append(cap)
+            cap += 1
+        return caps
+
+    def layer_counts(self, columns):
+        """统计每层被占用的列数
+
+        把每列的位掩码展开成每层一个 field 位宽的字段再相加，
+        一次整数加法就同时累加了所有层，第 y 层的数量在第 y 个字段中。
+        """
+        spread = self.spread
+        total = 0
+        for column in columns:
+            shift = 0
+            while column:
+                total += spread[column & 0xFF] << shift
+                column >>= 8
+                shift += 8 * self.field
+        return total
+
+    def lines_bound(self, columns, remaining):
+        """剩余方块最多还能消除的层数
+
+        每层只能作为整体被消除，要消除一层必须把它的空格全部填满。
+        被覆盖的空格只有在上方压着它的各层先被消除后才能填上，这些层的空格
+        也要算进去；总数超过剩余方块格子数的层不可能被消除。其余各层按缺少的
+        格子数从少到多依次填满，直到剩余方块的格子不够为止。
+        """
+        budget = 4 * remaining
+        top = max(column.bit_length() for column in columns)
+        counts = self.layer_counts(columns)
+        field = self.field
+        mask = (1 << field) - 1
+        missing = [self.area - (counts >> (field * y) & mask) for y in range(top)]
+
+        # 每层被覆盖的空格所依赖的上方各层（按位记录层号）
+        required = [0] * top
+        for column in columns:
+            holes = ~column & ((1 << column.bit_length()) - 1)
+            while holes:
+                y = (holes & -holes).bit_length() - 1
+                holes &= holes - 1
+                required[y] |= column >> (y + 1) << (y + 1)
+
+        costs = []
+        for y in range(top):
+            cost = missing[y]
+            above = required[y]
+            while above:
+                cost += missing[(above & -above).bit_length() - 1]
+                above &= above - 1
+            if cost <= budget:
+                costs.append(missing[y])
+        costs.sort()
+
+        lines = 0
+        for count in costs:
+            if count > budget:
+                return lines
+            budget -= count
+            lines += 1
+        # 现有各层都填满后，剩下的格子只能组成新的整层
+        return lines + budget // self.area
+
+    def reach(self, columns, index, need, cap, strict=False):
+        """搜索从第 index 个方块开始再消除至少 need 层的落点序列
+
+        Args:
+            cap: 方块不能超出的层数
+            strict: 是否只考虑不产生空洞的落点
+
+        Returns:
+            list: 落点序列，达到 need 层后就结束；找不到时返回None
+        """
+        self.nodes += 1
+        if need <= 0:
+            return []
+        remaining = len(self.sequence) - index
+        if remaining == 0:
+            return None
+
+        if self.lines_bound(columns, remaining) < need:
+            return None
+        # 能否达到是单调的：达不到 n 层就一定达不到更多层，置换表记录已知达不到的最小层数
+        key = (self.canonical(columns), index, cap, strict)
+        if self.unreachable.get(key, need + 1) <= need:
+            return None
+
+        for placement, placed, lines, _ in self.children(columns, index, cap, strict):
+            rest = self.reach(placed, index + 1, need - lines, cap - lines, strict)
+            if rest is not None:
+                return [placement] + rest
+
+        self.unreachable[key] = min(self.unreachable.get(key, need), need)
+        return None
+
+    def strict_cap(self, columns, need):
+        """快速搜索时方块不超出的层数：刚好容纳现有方块和要消除的层"""
+        return min(max(max(column.bit_length() for column in columns), need), self.height)
+
+    def best_lines(self, columns, index=0):
+        """从上界开始逐个降低目标层数搜索，第一个能达到的目标就是最多消层数
+
+        每个目标先做快速搜索：只考虑不产生空洞、不超出要消除的层的落点，
+        范围小得多，大多数能达到的目标在这一步就能找到；找不到时逐步放宽，
+        最后搜索全部落点。置换表在各轮之间共享。
+
+        Returns:
+            tuple: (层数, 落点序列)
+        """
+        remaining = len(self.sequence) - index
+        for need in range(self.lines_bound(columns, remaining), 0, -1):
+            for cap, strict in self.phases(columns, need):
+                path = self.reach(columns, index, need, cap, strict)
+                if path is not None:
+                    return need, path
+        return 0, []
+
+    def phases(self, columns, need):
+        """消层模式每个目标依次尝试的搜索范围 [(cap, strict)]，从小到大，最后一个是完整搜索"""
+        return [(self.strict_cap(columns, need), True), (self.height, True), (self.height, False)]
+
+
+# 子进程中的求解器，进程池启动时按本次求解的问题创建一次。同一进程搜索的所有子树
+# （包括全消的各个目标高度、消层的各个目标和搜索范围）共用它的置换表
+_worker_solver = None
+
+
+def _init_worker(width, depth, height, sequence):
+    global _worker_solver
+    _worker_solver = Solver(width, depth, height, sequence)
+
+
+def _solve_subtree(task):
+    """在子进程中搜索第一个方块某个落点之后的子树
+
+    全消模式在目标高度 target 内搜索；消层模式搜索再消除 target 层的落点序列。
+
+    Returns:
+        tuple: (落点序列或None, 本次搜索的节点数)
+    """
+    mode, columns, target, lines, cap, strict = task
+    solver = _worker_solver
+    before = solver.nodes
+    if mode == 'perfect':
+        result = solver.perfect(columns, 1, target - lines, lines, strict)
+    else:
+        result = solver.reach(columns, 1, target, cap - lines, strict)
+    return result, solver.nodes - before
+
+
+def _first_in_order(executor, solver, tasks, window):
+    """按顺序取第一个有解的子树
+
+    同时只提交 window 个子树，前面的子树有解时后面的不再提交，
+    避免像一次全部提交那样把单进程不会搜索的子树也搜索一遍。
+
+    Returns:
+        tuple: (子树下标, 落点序列)，都无解时为 (None, None)
+    """
+    pending = []
+    next_task = 0
+    for index in range(len(tasks)):
+        while next_task < len(tasks) and len(pending) < window:
+            pending.append(executor.submit(_solve_subtree, tasks[next_task]))
+            next_task += 1
+        rest, nodes = pending.pop(0).result()
+        solver.nodes += nodes
+        if rest is not None:
+            for other in pending:
+                other.cancel()
+            return index, rest
+    return None, None
+
+
+def solve(board, sequence, height, mode='perfect', workers=1):
+    """求解一个棋盘和方块序列
+
+    Args:
+        board: 棋盘对象（需要 width、depth 和 column_masks()）
+        sequence: 方块形状键序列
+        height: 允许堆叠的最高层数
+        mode: 'perfect' 或 'lines'
+        workers: 并行搜索的进程数，为None时使用全部CPU
+
+    Returns:
+        dict: {'placements': [(形状键, 朝向, x, z), ...], 'lines': 消除层数,
+               'perfect': 是否全消, 'nodes': 搜索的节点数}
+               全消模式找不到解时 placements 为None
+    """
+    if mode not in MODES:
+        raise ValueError(f"未知的求解模式: {mode}，可选: {', '.join(MODES)}")
+    columns = tuple(board.column_masks())
+    solver = Solver(board.width, board.depth, height, sequence)
+    workers = workers or os.cpu_count()
+    executor = None
+    if workers > 1 and sequence:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                       initargs=(board.width, board.depth, height, list(sequence)))
+
+    try:
+        if mode == 'perfect':
+            placements = None
+            # 先只搜索不产生空洞的落点，找不到时允许空洞再搜索一遍
+            for strict in (True, False):
+                for cap in solver.perfect_caps(columns, strict=strict):
+                    if executor:
+                        placements = _perfect_parallel(executor, solver, columns, cap, workers, strict)
+                    else:
+                        placements = solver.perfect(columns, 0, cap, strict=strict)
+                    if placements is not None:
+                        break
+                if placements is not None:
+                    break
+        elif executor:
+            _, placements = _lines_parallel(executor, solver, columns, workers)
+        else:
+            _, placements = solver.best_lines(columns)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+
+    lines = 0
+    if placements is not None:
+        lines = _count_lines(solver, columns, placements)
+        placements = [(shape_key,) + placement for shape_key, placement in zip(sequence, placements)]
+    return {
+        'placements': placements,
+        'lines': lines,
+        'perfect': mode == 'perfect' and placements is not None,
+        'nodes': solver.nodes,
+    }
+
+
+def _perfect_parallel(executor, solver, columns, cap, workers, strict=True):
+    """并行搜索全消：各个子树按落点顺序检查，取第一个有解的子树"""
+    limit = cap if strict else min(cap, solver.height)
+    children = solver.children(columns, 0, limit, strict)
+    tasks = [('perfect', placed, cap, lines, cap, strict) for _, placed, lines, _ in children]
+    solver.nodes += 1
+    index, rest = _first_in_order(executor, solver, tasks, workers)
+    if index is None:
+        return None
+    return [children[index][0]] + rest
+
+
+def _lines_parallel(executor, solver, columns, workers):
+    """并行搜索最多消层：与 best_lines 的顺序相同，每一轮把第一个方块的各个落点分给
+    多个进程搜索，按落点顺序取第一个能达到目标的"""
+    solver.nodes += 1
+    for need in range(solver.lines_bound(columns, len(solver.sequence)), 0, -1):
+        for cap, strict in solver.phases(columns, need):
+            candidates = solver.children(columns, 0, cap, strict)
+            tasks = [('lines', placed, need - lines, lines, cap, strict) for _, placed, lines, _ in candidates]
+            index, rest = _first_in_order(executor, solver, tasks, workers)
+            if index is not None:
+                return need, [candidates[index][0]] + rest
+    return 0, []
+
+
+def _count_lines(solver, columns, placements):
+    """按落点序列重放，统计消除的层数"""
+    table = {shape_key: dict(entries) for shape_key, entries in solver.table.items()}
+    total = 0
+    for shape_key, placement in zip(solver.sequence, placements):
+        landed = drop_cells(columns, table[shape_key][placement], solver.drop_height)
+        columns, lines = place_cells(columns, landed)
+        total += lines
+    return total
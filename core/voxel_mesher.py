@@ -0,0 +1,120 @@
+"""已放置方块的分层网格生成
+
+每一层已放置的方块合并成网格实体，只包含暴露在外的面（由 core.layer_faces 生成），
+颜色写入顶点色。大网格上每层再按列分块，方块落地时只重建落点所在的块及上下相邻层的
+同一块，场景中的节点数和绘制调用数只与层数和分块数有关，与方块数量无关。
+
+每层的节点随内容一起移动：消层时销毁被消除层的节点，上方各层节点一次性
+下移到新的层号，只有消除处上下新接触的两层需要重建网格。
+"""
+from ursina import Entity, Mesh, destroy
+from core.layer_faces import build_layer_faces, chunk_mask, layer_chunks, touched_chunks
+from util import profiler
+
+
+class LayerMesher:
+    """按层管理已放置方块的合并网格实体
+
+    每层一个父节点，父节点下按 CHUNK_SIZE×CHUNK_SIZE 列分块，每块一个网格实体。
+    落地只重建落点所在的块（以及被它遮挡或露出的相邻块），大网格上一次落地的
+    重建量与网格尺寸无关；消层时整层的父节点一起移动。
+    """
+
+    def __init__(self, board, palette, origin):
+        """
+        Args:
+            board: 棋盘占用网格
+            palette: 形状键到颜色的映射
+            origin: 网格坐标 (0, 0, 0) 对应的世界坐标
+        """
+        self.board = board
+        self.palette = palette
+        self.origin = origin
+        self.chunks = layer_chunks(board.width, board.depth)
+        self.chunk_masks = {chunk: chunk_mask(board.width, board.depth, chunk) for chunk in self.chunks}
+        self.nodes = []  # 每层的父节点，空层为None；父节点的 chunks 属性为 {分块: 网格实体}
+        self.dirty = set()  # 需要重建的 (层号, 分块)
+
+    def mark_dirty(self, layers):
+        """标记需要整层重建的层"""
+        self.dirty.update((y, chunk) for y in layers if y >= 0 for chunk in self.chunks)
+
+    def mark_cells_dirty(self, cells):
+        """方块落地后标记受影响的分块"""
+        self.dirty |= touched_chunks(cells, self.board.width, self.board.depth)
+
+    def clear_layers(self, layers):
+        """销毁被消除层的节点，上方各层节点整体下移
+
+        多层消除也只对每个节点设置一次新位置；已标记的脏块按下移后的层号重新登记，
+        消除处上下新接触的两层因遮挡关系变化需要重建。
+        """
+        removed = sorted(y for y in set(layers) if y >= 0)
+        if not removed:
+            return
+
+        def shifted(y):
+            return y - sum(1 for r in removed if r < y)
+
+        # 已标记的块换算成下移后的层号，被消除的层直接丢弃
+        self.dirty = {(shifted(y), chunk) for y, chunk in self.dirty if y not in removed}
+        for y in removed:
+            seam = shifted(y)
+            self.mark_dirty((seam - 1, seam))
+
+        lowest = removed[0]
+        kept = []
+        for y in range(lowest, len(self.nodes)):
+            node = self.nodes[y]
+            if y in removed:
+                if node:
+                    destroy(node)
+                continue
+            if node:
+                node.y = self.origin[1] + lowest + len(kept)
+            kept.append(node)
+        self.nodes[lowest:] = kept
+
+    @profiler.timed('mesh_rebuild')
+    def rebuild(self):
+        """重建所有被标记的分块"""
+        for y, chunk in sorted(self.dirty):
+            self._rebuild_chunk(y, chunk)
+        self.dirty.clear()
+
+    def _rebuild_chunk(self, y, chunk):
+        while len(self.nodes) <= y:
+            self.nodes.append(None)
+        node = self.nodes[y]
+
+        vertices, triangles, colors, uvs, normals = build_layer_faces(
+            self.board, y, self.palette, self.chunk_masks[chunk])
+        if not vertices:
+            if node and chunk in node.chunks:
+                destroy(node.chunks.pop(chunk))
+                if not node.chunks:
+                    destroy(node)
+                    self.nodes[y] = None
+            return
+
+        if node is None:
+            ox, oy, oz = self.origin
+            node = self.nodes[y] = Entity(position=(ox, oy + y, oz))
+            node.chunks = {}
+        mesh = Mesh(vertices=vertices, triangles=triangles, colors=colors, uvs=uvs, normals=normals)
+        if chunk in node.chunks:
+            node.chunks[chunk].model = mesh
+        else:
+            node.chunks[chunk] = Entity(
+                parent=node,
+                model=mesh,
+                texture='white_cube',  # 与活动方块相同的纹理，保留方块边框
+                double_sided=True
+            )
+
+    def clear(self):
+        for node in self.nodes:
+            if node:
+                destroy(node)
+        self.nodes = []
+        self.dirty.clear()
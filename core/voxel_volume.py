@@ -0,0 +1,257 @@
+"""基于 NumPy 的体素网格后端
+
+整个棋盘保存为一个 uint8 三维数组 volume[y, x, z]，每格存放调色板下标：
+0 表示空，1..N 对应 config.shapes 中的形状。每格只占 1 字节，
+满层、列高、空洞数和消层压缩都是整块数组运算。
+每列高度和最高堆叠高度只在落地和消层时更新，可直接O(1)查询。
+
+zobrist 是与 LayerOccupancy 相同的增量棋盘哈希，两种后端上同一个棋盘的哈希相同。
+
+numpy 是可选依赖，只有在 config.BOARD_BACKEND = 'numpy' 时才需要。
+"""
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖
+    np = None
+
+from config.rules import shapes
+from core.zobrist import cell_key, layer_term
+
+# 调色板：下标0为空格，其余按形状顺序排列
+SHAPE_PALETTE = (None,) + tuple(shapes.keys())
+PALETTE_INDEX = {key: i for i, key in enumerate(SHAPE_PALETTE) if key}
+
+
+class VoxelVolume:
+    """稠密体素网格，对外提供与 {(x, y, z): shape_key} 字典相同的接口"""
+
+    def __init__(self, width, depth, height=32):
+        if np is None:
+            raise ImportError("numpy 后端需要先安装 numpy: pip install numpy")
+        self.width = width
+        self.depth = depth
+        self.volume = np.zeros((height, width, depth), dtype=np.uint8)
+        self.heights = np.zeros((width, depth), dtype=np.int32)  # 每列最高方块之上的层号
+        self.max_height = 0  # 整个棋盘的最高堆叠高度
+        self.layer_hashes = [0] * height  # 每层的 Zobrist 哈希
+        self.zobrist = 0  # 整个棋盘的 Zobrist 哈希
+
+    def _ensure_height(self, y):
+        """需要时成倍扩展数组高度，方块可能落在生成区之上"""
+        height = self.volume.shape[0]
+        if y < height:
+            return
+        new_height = max(y + 1, height * 2)
+        grown = np.zeros((new_height, self.width, self.depth), dtype=np.uint8)
+        grown[:height] = self.volume
+        self.volume = grown
+        self.layer_hashes += [0] * (new_height - height)
+
+    def _toggle_hash(self, x, y, z):
+        """某格占用状态改变时更新该层和整个棋盘的哈希"""
+        old = self.layer_hashes[y]
+        new = old ^ cell_key(x, z)
+        self.layer_hashes[y] = new
+        self.zobrist ^= layer_term(old, y) ^ layer_term(new, y)
+
+    def _in_bounds(self, x, y, z):
+        return 0 <= y < self.volume.shape[0] and 0 <= x < self.width and 0 <= z < self.depth
+
+    def is_occupied(self, x, y, z):
+        """判断某格是否被占用，越界的格子视为空"""
+        return self._in_bounds(x, y, z) and self.volume[y, x, z] != 0
+
+    def top_cells(self):
+        """逐列给出最高方块 {(x, z): (y, shape_key)}，空列不包含在内"""
+        tops = {}
+        for x, z in zip(*np.nonzero(self.heights)):
+            y = int(self.heights[x, z]) - 1
+            tops[(int(x), int(z))] = (y, SHAPE_PALETTE[self.volume[y, x, z]])
+        return tops
+
+    def column_masks(self):
+        """每列的占用位掩码（第 y 位表示第 y 层有方块），下标为 x + z * width"""
+        masks = []
+        for z in range(self.depth):
+            for x in range(self.width):
+                mask = 0
+                for y in np.flatnonzero(self.volume[:self.heights[x, z], x, z]):
+                    mask |= 1 << int(y)
+                masks.append(mask)
+        return masks
+
+    def layer_mask(self, y):
+        """某层的占用位掩码，(x, z) 格对应第 x + z * width 位，与 LayerOccupancy 相同"""
+        if not 0 <= y < self.volume.shape[0]:
+            return 0
+        # volume[y] 按 (x, z) 排列，转置成 z 在外层后逐位打包
+        bits = np.packbits(self.volume[y].T.ravel() != 0, bitorder='little')
+        return int.from_bytes(bits.tobytes(), 'little')
+
+    def _refresh_heights(self):
+        self.heights = self.column_heights().astype(np.int32)
+        self.max_height = int(self.heights.max())
+
+    def fits(self, origin, offsets):
+        """判断以 origin 为原点、按 offsets 摆放的方块是否在界内且不与已有方块重叠"""
+        ox, oy, oz = origin
+        volume = self.volume
+        top = volume.shape[0]
+        for bx, by, bz in offsets:
+            x = ox + bx
+            y = oy + by
+            z = oz + bz
+            if not (0 <= x < self.width and y >= 0 and 0 <= z < self.depth):
+                return False
+            if y < top and volume[y, x, z]:
+                return False
+        return True
+
+    def first_fit(self, origin, candidates):
+        """返回第一个能放下的候选摆放下标，都放不下时返回-1"""
+        for index, offsets in enumerate(candidates):
+            if self.fits(origin, offsets):
+                return index
+        return -1
+
+    def drop_distance(self, origin, bottoms):
+        """方块从 origin 处能够直接下落的格数
+
+        Args:
+            origin: 方块原点 (x, y, z)
+            bottoms: 方块在各列最低格的偏移，只需检查这些格下方
+        """
+        ox, oy, oz = origin
+        distance = None
+        for bx, by, bz in bottoms:
+            y = oy + by
+            x = ox + bx
+            z = oz + bz
+            floor = int(self.heights[x, z])
+            if floor > y:
+                # 方块位于悬空结构之下，才需要往下查找
+                below = np.flatnonzero(self.volume[:y, x, z])
+                floor = int(below[-1]) + 1 if len(below) else 0
+            if distance is None or y - floor < distance:
+                distance = y - floor
+        return distance or 0
+
+    def get(self, pos, default=None):
+        x, y, z = pos
+        if self._in_bounds(x, y, z):
+            index = self.volume[y, x, z]
+            if index:
+                return SHAPE_PALETTE[index]
+        return default
+
+    def __contains__(self, pos):
+        return self.is_occupied(*pos)
+
+    def __getitem__(self, pos):
+        value = self.get(pos)
+        if value is None:
+            raise KeyError(pos)
+        return value
+
+    def __setitem__(self, pos, shape_key):
+        x, y, z = pos
+        if not (0 <= x < self.width and y >= 0 and 0 <= z < self.depth):
+            raise ValueError(f"网格坐标越界: {pos}")
+        self._ensure_height(y)
+        if not self.volume[y, x, z]:
+            self._toggle_hash(x, y, z)
+        self.volume[y, x, z] = PALETTE_INDEX[shape_key]
+        if y >= self.heights[x, z]:
+            self.heights[x, z] = y + 1
+            self.max_height = max(self.max_height, y + 1)
+
+    def __delitem__(self, pos):
+        if not self.is_occupied(*pos):
+            raise KeyError(pos)
+        x, y, z = pos
+        self.volume[y, x, z] = 0
+        self._toggle_hash(x, y, z)
+        # 只有删除的是该列最高的方块时才需要更新这一列
+        if y + 1 == self.heights[x, z]:
+            below = np.flatnonzero(self.volume[:y, x, z])
+            self.heights[x, z] = int(below[-1]) + 1 if len(below) else 0
+            if y + 1 == self.max_height:
+                self.max_height = int(self.heights.max())
+
+    def __len__(self):
+        return int(np.count_nonzero(self.volume))
+
+    def __iter__(self):
+        for y, x, z in zip(*np.nonzero(self.volume)):
+            yield (int(x), int(y), int(z))
+
+    def items(self):
+        for y, x, z in zip(*np.nonzero(self.volume)):
+            yield (int(x), int(y), int(z)), SHAPE_PALETTE[self.volume[y, x, z]]
+
+    def clear(self):
+        self.volume[:] = 0
+        self.heights[:] = 0
+        self.max_height = 0
+        self.layer_hashes = [0] * self.volume.shape[0]
+        self.zobrist = 0
+
+    def full_layers(self, layers=None):
+        """返回已填满的层号（升序）
+
+        Args:
+            layers: 只检查这些层；为None时检查所有层
+        """
+        if layers is None:
+            # 最高堆叠高度之上都是空层
+            stacked = self.volume[:self.max_height].reshape(self.max_height, self.width * self.depth)
+            return [int(y) for y in np.flatnonzero(stacked.all(axis=1))]
+        ys = sorted({y for y in layers if 0 <= y < self.max_height})
+        if not ys:
+            return []
+        full = self.volume[ys].reshape(len(ys), -1).all(axis=1)
+        return [y for y, is_full in zip(ys, full) if is_full]
+
+    def clear_layers(self, layers):
+        """移除指定的层并把上方各层整体下移
+
+        Args:
+            layers: 要移除的层号
+
+        Returns:
+            int: 实际移除的层数
+        """
+        height = self.volume.shape[0]
+        removed = sorted({y for y in layers if 0 <= y < height})
+        if not removed:
+            return 0
+        kept = np.delete(self.volume, removed, axis=0)
+        self.volume[:len(kept)] = kept
+        self.volume[len(kept):] = 0
+
+        # 下移的各层按新层号重新加入棋盘哈希
+        lowest = removed[0]
+        hashes = self.layer_hashes
+        for y in range(lowest, height):
+            self.zobrist ^= layer_term(hashes[y], y)
+        removed_set = set(removed)
+        kept_hashes = [h for y, h in enumerate(hashes[lowest:], lowest) if y not in removed_set]
+        hashes[lowest:] = kept_hashes + [0] * len(removed)
+        for y in range(lowest, height):
+            self.zobrist ^= layer_term(hashes[y], y)
+        self._refresh_heights()
+        return len(removed)
+
+    def column_heights(self):
+        """每列最高方块之上的层号，形状为 (width, depth)，空列为0"""
+        occupied = self.volume != 0
+        height = self.volume.shape[0]
+        # 从顶部往下找到第一个被占用的格子
+        top_from_above = occupied[::-1].argmax(axis=0)
+        return np.where(occupied.any(axis=0), height - top_from_above, 0)
+
+    def hole_count(self):
+        """统计空洞数：位于某列最高方块之下的空格数量"""
+        heights = self.column_heights()
+        filled = np.count_nonzero(self.volume, axis=0)
+        return int((heights - filled).sum())
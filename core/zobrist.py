@@ -0,0 +1,69 @@
+"""Zobrist 棋盘哈希
+
+每个 (x, z) 位置有一个固定的64位随机键，一层的哈希是该层所有被占用格子的键的
+异或；整个棋盘的哈希是各层哈希乘以该层的奇数随机系数后的异或。
+放下或移除一个格子只需更新一层；消层时上方各层整体下移，只需按新的层号
+重新组合各层哈希，不必逐格重算。
+
+随机键由 splitmix64 从下标直接算出，不依赖运行顺序和进程，不同机器上同一个
+棋盘的哈希相同，可以用作回放和联机的逐帧校验值。
+"""
+MASK64 = (1 << 64) - 1
+
+
+def splitmix64(value):
+    """把整数打散成64位的伪随机数"""
+    value = (value + 0x9E3779B97F4A7C15) & MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK64
+    return value ^ (value >> 31)
+
+
+def cell_key(x, z):
+    """(x, z) 位置的随机键"""
+    return splitmix64((x << 32) ^ z ^ 0x5A0B)
+
+
+# 各层的组合系数，按需增长
+_layer_keys = []
+
+
+def layer_key(y):
+    """第 y 层的组合系数（奇数，乘法可逆）"""
+    while len(_layer_keys) <= y:
+        _layer_keys.append(splitmix64(len(_layer_keys) ^ 0x1A7E5) | 1)
+    return _layer_keys[y]
+
+
+def layer_term(layer_hash, y):
+    """一层在棋盘哈希中的贡献"""
+    return (layer_hash * layer_key(y)) & MASK64
+
+
+def combine_layers(layer_hashes):
+    """由各层哈希组合出整个棋盘的哈希"""
+    board_hash = 0
+    for y, layer_hash in enumerate(layer_hashes):
+        if layer_hash:
+            board_hash ^= layer_term(layer_hash, y)
+    return board_hash
+
+
+def mix(board_hash, *values):
+    """把若干整数依次混入哈希，用于在棋盘哈希之外加入方块、分数等状态"""
+    for value in values:
+        board_hash = splitmix64(board_hash ^ (value & MASK64))
+    return board_hash
+
+
+def first_divergence(checksums, other):
+    """比较两串逐帧校验值，返回第一个不同的帧下标，完全相同时返回None
+
+    长度不同时较短一串结束后的第一帧视为不同。
+    """
+    for tick, (a, b) in enumerate(zip(checksums, other)):
+        if a != b:
+            return tick
+    if len(checksums) != len(other):
+        return min(len(checksums), len(other))
+    return None
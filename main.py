@@ -1,4 +1,42 @@
 # -*- coding: utf-8 -*-
+import argparse
+
+# 网格尺寸必须在导入其他模块之前确定，棋盘、界面和相机都在模块导入时按尺寸创建
+from config import rules
+from core.piece_source import POLICIES  # 不依赖网格尺寸，可以提前导入
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="3D俄罗斯方块")
+    parser.add_argument('--width', type=int, help=f"网格宽度，默认{rules.GRID_WIDTH}")
+    parser.add_argument('--depth', type=int, help=f"网格深度，默认{rules.GRID_DEPTH}")
+    parser.add_argument('--height', type=int, help=f"网格高度，默认{rules.GRID_HEIGHT}")
+    parser.add_argument('--seed', type=int, help="方块序列的种子，默认随机")
+    parser.add_argument('--policy', choices=POLICIES, help=f"出块方式，默认{rules.PIECE_POLICY}")
+    parser.add_argument('--replay', help="观看录制的回放文件（data/replays/*.t3dr）")
+    parser.add_argument('--replay-speed', type=float, default=1.0, help="回放速度倍数，默认1")
+    # ursina 也会读取命令行，忽略不认识的参数
+    args, _ = parser.parse_known_args()
+    if args.replay:
+        # 回放使用录制时的网格尺寸和出块方式
+        from core.replay import read_config
+        try:
+            config = read_config(args.replay)
+        except (OSError, ValueError) as e:
+            parser.error(f"无法读取回放文件: {e}")
+        args.width, args.height, args.depth = config['width'], config['height'], config['depth']
+        args.policy = config['policy']
+        if args.replay_speed <= 0:
+            parser.error("回放速度必须大于0")
+    try:
+        rules.configure_grid(args.width, args.height, args.depth)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.policy:
+        rules.PIECE_POLICY = args.policy
+    return args
+
+args = parse_args()
+
 from ursina import *
 import sys
 import time
@@ -9,13 +47,15 @@ from config.config import *
 from core.block import Block, GhostBlock
 from core.tetromino import Tetromino
 from ui.ui import create_ui, setup_next_preview, setup_orientation_view
-from core.game_grid import create_game_grid, check_lines, grid_positions
+from core.game_grid import create_game_grid, grid_positions
 from ui.camera_setup import setup_cameras, reset_camera, editor_cam
-from core.game_logic import spawn_tetromino, process_input
+from core.game_logic import spawn_tetromino, process_input, update_game
 from config.settings import setup_lighting, toggle_pause, reset_game, game_paused
 from audio.audio import load_sounds, play_game_start_sound  # 导入音效相关函数
 import config.settings as settings  # 导入settings模块以直接访问变量
 from util.history_manager import close_history_ui, history_ui_active  # 导入历史记录管理函数
+from ui.profiler_overlay import setup_profiler_overlay
+from util import profiler
 
 # 确保支持中文字符
 setup_encoding()
@@ -62,8 +102,13 @@ orientation_indicator = setup_orientation_view()
 # 设置下一个方块预览
 next_preview = setup_next_preview()
 
+# 性能分析浮层，F3键开启
+setup_profiler_overlay()
+
 # 定义应用更新函数
 def update():
+    profiler.end_frame(len(scene.entities))
+    update_game()
     update_views()
 
 # 处理输入 - 增强输入处理，确保ESC键能关闭历史界面
@@ -81,8 +126,22 @@ def input(key):
     # 正常处理游戏输入
     process_input(key)
 
-# 生成第一个方块
-spawn_tetromino()
+from core.game_logic import game_state, start_recording, start_replay
+if args.replay:
+    # 回放模式：由录制的操作驱动，代替生成第一个方块
+    from core.replay import load
+    start_replay(load(args.replay), args.replay_speed)
+else:
+    # 指定种子时从这个种子重新开始，同样的种子得到同样的方块序列
+    if args.seed is not None:
+        game_state.reset(args.seed)
+    print(f"方块序列种子: {game_state.seed}")
+
+    # 录制本局的操作，游戏结束或退出时保存到 data/replays
+    start_recording()
+
+    # 生成第一个方块
+    spawn_tetromino()
 
 # 运行游戏
 app.run()
@@ -0,0 +1 @@
+# 使tests目录成为Python包，pytest 会把项目根目录加入导入路径
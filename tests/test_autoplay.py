@@ -0,0 +1,46 @@
+"""落点搜索自动玩家的测试"""
+from core.autoplay import PlacementBot
+from core.game_state import GameState, Piece
+
+
+def rest_on_floor(state):
+    """把当前方块直接移到落地前的位置，不触发落地"""
+    piece = state.piece
+    ox, oy, oz = piece.origin
+    piece.origin = (ox, oy - state.drop_distance(), oz)
+
+
+def test_choose_piece_resting_on_floor():
+    for lookahead in (False, True):
+        state = GameState(4, 8, 4, seed=0)
+        state.spawn()
+        state.piece = Piece('Z', (2, 0, 2))
+        rest_on_floor(state)
+        bot = PlacementBot(lookahead=lookahead)
+        placement = bot.choose(state)
+        assert placement is not None
+        assert state.place(*placement)
+        assert state.pieces_placed == 1
+
+
+def test_choose_every_shape_near_floor():
+    bot = PlacementBot()
+    state = GameState(4, 8, 4, seed=1)
+    state.spawn()
+    for _ in range(20):
+        if state.game_over:
+            break
+        rest_on_floor(state)
+        placement = bot.choose(state)
+        assert placement is not None
+        assert state.place(*placement)
+
+
+def test_bot_survives_many_pieces():
+    state = GameState(4, 25, 4, seed=2, policy='bag')
+    state.spawn()
+    bot = PlacementBot()
+    while not state.game_over and state.pieces_placed < 200:
+        assert state.place(*bot.choose(state))
+    assert state.pieces_placed == 200
+    assert state.lines_cleared > 0
@@ -0,0 +1,56 @@
+"""BatchEnv 与 GameState 一致性的测试"""
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from core.agents import RandomAgent
+from core.batch_env import BatchEnv
+from core.game_state import GameState
+from core.voxel_volume import PALETTE_INDEX
+
+
+def board_array(state, height):
+    """GameState 的棋盘转成与 BatchEnv 相同的 (y, x, z) 调色板下标数组"""
+    board = np.zeros((height, state.width, state.depth), dtype=np.uint8)
+    for (x, y, z), shape_key in state.board.items():
+        if y < height:
+            board[y, x, z] = PALETTE_INDEX[shape_key]
+    return board
+
+
+@pytest.mark.parametrize('agent_seed', [0, 72])
+def test_matches_game_state(agent_seed):
+    width, height, depth, num_envs = 4, 10, 4, 8
+    env = BatchEnv(num_envs, width, height, depth, seed=100)
+    env.reset()
+    states = [GameState(width, height, depth, seed=100 + env_index) for env_index in range(num_envs)]
+    for state in states:
+        state.spawn()
+    agents = [RandomAgent(agent_seed + env_index) for env_index in range(num_envs)]
+
+    # 每个棋盘只比较第一局，结束的棋盘之后随便给动作
+    for _ in range(300):
+        if all(state is None for state in states):
+            break
+        actions = []
+        for state, agent in zip(states, agents):
+            orientation, x, z = (state and agent.choose(state)) or (0, 0, 0)
+            actions.append((orientation * width + x) * depth + z)
+        _, rewards, dones, info = env.step(actions)
+
+        for env_index, state in enumerate(states):
+            if state is None:
+                continue
+            action = actions[env_index]
+            score = state.score
+            state.place(action // (width * depth), action // depth % width, action % depth)
+            assert bool(dones[env_index]) == state.game_over
+            assert rewards[env_index] == state.score - score
+            if state.game_over:
+                assert info['final_score'][env_index] == state.score
+                assert info['final_pieces'][env_index] == state.pieces_placed
+                states[env_index] = None
+            else:
+                assert np.array_equal(env.boards[env_index, :height], board_array(state, height))
+                assert env.shapes[env_index] == PALETTE_INDEX[state.piece.shape_key]
+    assert all(state is None for state in states)
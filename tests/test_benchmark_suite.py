@@ -0,0 +1,29 @@
+"""基准测试套件的测试"""
+import random
+
+from benchmarks import suite
+
+
+def test_lock_restores_board_after_clears():
+    state, stack = suite.build_state(4, 4, 25, 0.1, 'bitboard', 0)
+    zobrist = state.board.zobrist
+    prepare, finish = suite.operations(state, stack, random.Random(0))['lock_to_spawn']
+    suite.measure(prepare, finish, 500)
+    assert state.lines_cleared > 0
+    assert state.board.zobrist == zobrist
+
+
+def report(min_ns, median_ns, spread, alloc_bytes=0):
+    metrics = {'min_ns': min_ns, 'median_ns': median_ns, 'spread': spread, 'alloc_bytes': alloc_bytes}
+    return {'cases': {'case': {'op': metrics}}}
+
+
+def test_compare_gates_only_stable_timings():
+    baseline = report(1000, 1050, 0.05)
+    assert suite.compare(report(1100, 1150, 0.05), baseline, 0.25) == ([], [])
+    regressions, _ = suite.compare(report(2000, 2100, 0.05), baseline, 0.25)
+    assert [metric for _, _, metric, _, _ in regressions] == ['min_ns']
+    # 各轮相差太大时不比较耗时，分配字节数仍然比较
+    regressions, unstable = suite.compare(report(2000, 3000, 0.5, alloc_bytes=4096), baseline, 0.25)
+    assert unstable == [('case', 'op')]
+    assert [metric for _, _, metric, _, _ in regressions] == ['alloc_bytes']
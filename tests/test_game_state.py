@@ -0,0 +1,70 @@
+"""GameState 的无界面测试"""
+from core.game_state import GameState, TICK_RATE, NORMAL_FALL_SPEED, SOFT_DROP_SPEED
+
+
+def hard_drop_until_game_over(state, limit=1000):
+    """不断硬降直到游戏结束，返回最后一次硬降产生的事件"""
+    state.spawn()
+    events = state.pop_events()
+    for _ in range(limit):
+        state.apply_action('hard_drop')
+        events = state.pop_events()
+        if state.game_over:
+            return events
+    raise AssertionError("游戏没有结束")
+
+
+def test_hard_drop_game_over_events():
+    state = GameState(4, 8, 4, seed=0, record_events=True)
+    events = hard_drop_until_game_over(state)
+    kinds = [event[0] for event in events]
+    assert state.piece is None
+    assert kinds[-1] == 'game_over'
+    assert 'locked' in kinds
+    # 落地之后不会再有属于这个方块的移动事件
+    assert 'moved' not in kinds[kinds.index('locked'):]
+
+
+def test_spawned_event_carries_piece():
+    state = GameState(4, 8, 4, seed=3, record_events=True)
+    state.spawn()
+    first = state.pop_events()[-1]
+    assert first[0] == 'spawned'
+    _, shape_key, piece, next_shape_key = first
+    assert piece is state.piece and shape_key == piece.shape_key
+    assert next_shape_key == state.next_shape_key
+
+    # 硬降后同一批事件里生成的新方块就是当前方块
+    state.apply_action('hard_drop')
+    events = state.pop_events()
+    spawned = [event for event in events if event[0] == 'spawned']
+    assert spawned[-1][2] is state.piece
+    assert piece is not state.piece
+
+
+def test_same_seed_same_game():
+    a = GameState(4, 8, 4, seed=11, policy='bag')
+    b = GameState(4, 8, 4, seed=11, policy='bag')
+    hard_drop_until_game_over(a)
+    hard_drop_until_game_over(b)
+    assert a.checksum() == b.checksum()
+    assert a.pieces_placed == b.pieces_placed
+
+
+def cells_fallen(state, ticks):
+    """推进若干帧，返回当前方块下落的格数"""
+    start = state.piece.origin[1]
+    state.advance(ticks)
+    return start - state.piece.origin[1]
+
+
+def test_gravity_matches_fall_speed():
+    state = GameState(4, 80, 4, seed=0)
+    state.spawn()
+    assert cells_fallen(state, round(TICK_RATE / NORMAL_FALL_SPEED)) == 1
+
+    state = GameState(4, 80, 4, seed=0)
+    state.spawn()
+    state.apply_action('soft_drop')
+    # 每秒正好下落 SOFT_DROP_SPEED 格
+    assert cells_fallen(state, TICK_RATE) == SOFT_DROP_SPEED
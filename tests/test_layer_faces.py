@@ -0,0 +1,79 @@
+"""暴露面生成的测试"""
+import random
+
+import pytest
+
+from core.bitboard import LayerOccupancy
+from core.layer_faces import build_layer_faces, chunk_mask, layer_chunks, touched_chunks
+
+PALETTE = {key: key for key in 'TIJLOSZ'}
+
+
+def face_count(board, y, region=None):
+    return len(build_layer_faces(board, y, PALETTE, region)[0]) // 4
+
+
+def quads(faces):
+    """按面比较的规范形式，与生成顺序无关"""
+    vertices, _, colors, _, normals = faces
+    return sorted((tuple(sorted(vertices[i:i + 4])), colors[i], normals[i])
+                  for i in range(0, len(vertices), 4))
+
+
+def test_single_and_adjacent_cubes():
+    board = LayerOccupancy(4, 4)
+    board[(1, 0, 1)] = 'T'
+    assert face_count(board, 0) == 6
+    board[(2, 0, 1)] = 'T'
+    assert face_count(board, 0) == 10
+    board[(2, 1, 1)] = 'I'
+    assert face_count(board, 0) == 9
+    assert face_count(board, 1) == 5
+
+
+def test_edges_do_not_wrap():
+    # 一行最右格与下一行最左格在掩码中相邻，不能互相遮挡
+    board = LayerOccupancy(4, 4)
+    board[(3, 0, 0)] = 'T'
+    board[(0, 0, 1)] = 'T'
+    assert face_count(board, 0) == 12
+
+
+def random_board(width, depth, layers, seed, fill=0.6):
+    rng = random.Random(seed)
+    board = LayerOccupancy(width, depth)
+    for y in range(layers):
+        for x in range(width):
+            for z in range(depth):
+                if rng.random() < fill:
+                    board[(x, y, z)] = rng.choice('TIJLOSZ')
+    return board
+
+
+def brute_force_count(board, y):
+    count = 0
+    for x in range(board.width):
+        for z in range(board.depth):
+            if board.is_occupied(x, y, z):
+                for dx, dy, dz in ((1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)):
+                    count += not board.is_occupied(x + dx, y + dy, z + dz)
+    return count
+
+
+@pytest.mark.parametrize('width, depth', [(4, 4), (5, 7), (33, 20)])
+def test_matches_brute_force_and_chunks(width, depth):
+    board = random_board(width, depth, 4, seed=width * depth)
+    for y in range(5):
+        assert face_count(board, y) == brute_force_count(board, y)
+        whole = quads(build_layer_faces(board, y, PALETTE))
+        chunked = []
+        for chunk in layer_chunks(width, depth):
+            chunked += quads(build_layer_faces(board, y, PALETTE, chunk_mask(width, depth, chunk)))
+        assert whole == sorted(chunked)
+
+
+def test_touched_chunks_cover_neighbours():
+    # 分块边界上的格子会遮挡旁边分块中的面
+    touched = touched_chunks([(15, 2, 3)], 32, 32)
+    assert touched == {(1, (0, 0)), (3, (0, 0)), (2, (0, 0)), (2, (1, 0))}
+    assert all(y >= 0 for y, _ in touched_chunks([(0, 0, 0)], 32, 32))
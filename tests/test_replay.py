@@ -0,0 +1,86 @@
+"""录制与回放的测试"""
+import random
+
+import pytest
+
+from core import replay
+from core.autoplay import PlacementBot
+from core.game_state import GameState, ACTIONS
+
+
+def test_varint_and_zigzag_round_trip():
+    values = [0, 1, 127, 128, 300, 16383, 16384, 2 ** 32, 2 ** 64 - 1]
+    data = bytearray()
+    for value in values:
+        replay.write_varint(data, value)
+    pos = 0
+    for value in values:
+        decoded, pos = replay.read_varint(data, pos)
+        assert decoded == value
+    assert pos == len(data)
+
+    for value in (0, 1, -1, 63, -64, 2 ** 40, -2 ** 40):
+        assert replay.zigzag(value) >= 0
+        assert replay.unzigzag(replay.zigzag(value)) == value
+
+
+def record_game(seed=5, steps=600):
+    """录制一局混合了按键和直接放置的游戏
+
+    Returns:
+        tuple: (回放数据, 结束时的 GameState)
+    """
+    state = GameState(4, 12, 4, seed=seed)
+    recorder = replay.ReplayRecorder.for_state(state)
+    state.spawn()
+    rng = random.Random(seed)
+    bot = PlacementBot()
+    for step in range(steps):
+        if state.game_over:
+            break
+        if step % 50 == 0:
+            state.place(*bot.choose(state))
+        else:
+            state.step(rng.choice(ACTIONS))
+    return recorder.finish(state.tick_count, state.checksum()), state
+
+
+def test_record_run_verify_round_trip():
+    data, original = record_game()
+    parsed = replay.parse(data)
+    kinds = {kind for _, kind, _ in parsed.records}
+    assert replay.PLACE in kinds and replay.CHECK in kinds
+    assert parsed.end == (original.tick_count, original.checksum())
+
+    player = replay.ReplayPlayer(parsed)
+    state = player.run()
+    assert player.verify() == (True, None)
+    assert state.checksum() == original.checksum()
+    assert state.pieces_placed == original.pieces_placed
+
+
+def test_divergence_reports_first_bad_checkpoint():
+    data, _ = record_game()
+    parsed = replay.parse(data)
+    # 把第一次直接放置改到另一列，之后的落地校验值都会不同
+    index, (tick, kind, (orientation, x, z)) = next(
+        (i, record) for i, record in enumerate(parsed.records) if record[1] == replay.PLACE)
+    parsed.records[index] = (tick, kind, (orientation, (x + 1) % 4, z))
+    player = replay.ReplayPlayer(parsed)
+    player.run()
+    ok, divergence = player.verify()
+    assert not ok
+    first_check = next(t for t, k, _ in parsed.records[index:] if k == replay.CHECK)
+    assert divergence == first_check
+
+
+def test_truncated_data_is_rejected_or_unfinished():
+    data, _ = record_game(steps=100)
+    for cut in range(len(data)):
+        try:
+            parsed = replay.parse(data[:cut])
+        except ValueError:
+            continue
+        assert parsed.end is None
+    with pytest.raises(ValueError):
+        replay.parse(b'XXXX' + data[4:])
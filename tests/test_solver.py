@@ -0,0 +1,40 @@
+"""离线求解器的测试"""
+from core.bitboard import LayerOccupancy
+from core.game_state import GameState, Piece
+from core.solver import solve
+
+
+def replay(placements, height):
+    """在 GameState 中依次放置求解结果，返回最终状态"""
+    state = GameState(4, height + 4, 4, seed=0)
+    state.spawn()
+    for shape_key, orientation, x, z in placements:
+        state.piece = Piece(shape_key, state.spawn_origin())
+        assert state.place(orientation, x, z)
+    return state
+
+
+def test_perfect_clear_through_covered_holes():
+    # 只有先盖住空洞、消除上方的层后才能全消的序列
+    for height in (4, 8):
+        result = solve(LayerOccupancy(4, 4), list('SIIZSTTL'), height)
+        assert result['perfect']
+        assert [placement[0] for placement in result['placements']] == list('SIIZSTTL')
+        state = replay(result['placements'], height)
+        assert len(state.board) == 0
+        assert state.lines_cleared == result['lines'] == 2
+
+
+def test_parallel_matches_sequential():
+    sequence = list('SIIZSTTL')
+    sequential = solve(LayerOccupancy(4, 4), sequence, 4)
+    parallel = solve(LayerOccupancy(4, 4), sequence, 4, workers=2)
+    assert parallel['placements'] == sequential['placements']
+
+
+def test_lines_mode_never_reports_perfect():
+    result = solve(LayerOccupancy(4, 4), list('IIII'), 4, mode='lines')
+    assert not result['perfect']
+    assert len(result['placements']) == 4
+    state = replay(result['placements'], 4)
+    assert state.lines_cleared == result['lines']
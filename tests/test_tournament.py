@@ -0,0 +1,17 @@
+"""锦标赛工具的测试"""
+import json
+
+from tools import tournament
+
+
+def test_resume_drops_partial_line(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    task = ('random', 0, 4, 8, 4, 20, 'uniform')
+    result = tournament.play_game(task)
+    assert result['seconds'] >= 0 and result['cpu_seconds'] >= 0
+    line = json.dumps(result) + '\n'
+    path.write_text(line + line[:15], encoding='utf-8')
+
+    tournament.truncate_partial_line(path)
+    assert path.read_text(encoding='utf-8') == line
+    assert list(tournament.load_finished(path)) == [task]
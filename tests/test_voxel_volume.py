@@ -0,0 +1,38 @@
+"""numpy 棋盘后端与 LayerOccupancy 一致性的测试"""
+import random
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from core.bitboard import LayerOccupancy
+from core.voxel_volume import VoxelVolume
+
+
+def assert_same(volume, occupancy):
+    assert dict(volume.items()) == dict(occupancy.items())
+    assert volume.max_height == occupancy.max_height
+    assert [int(volume.heights[x, z]) for z in range(volume.depth) for x in range(volume.width)] \
+        == occupancy.heights
+    assert volume.full_layers() == occupancy.full_layers()
+
+
+def test_random_edits_match_layer_occupancy():
+    rng = random.Random(0)
+    volume = VoxelVolume(2, 2, 4)
+    occupancy = LayerOccupancy(2, 2)
+    for _ in range(2000):
+        pos = (rng.randrange(2), rng.randrange(8), rng.randrange(2))
+        roll = rng.random()
+        if roll < 0.6:
+            volume[pos] = occupancy[pos] = rng.choice('TIO')
+        elif roll < 0.9:
+            if pos in occupancy:
+                del volume[pos]
+                del occupancy[pos]
+        else:
+            layers = [rng.randrange(-1, 10) for _ in range(3)]
+            assert volume.full_layers(layers) == occupancy.full_layers(layers)
+            full = occupancy.full_layers(layers)
+            assert volume.clear_layers(full) == occupancy.clear_layers(full)
+        assert_same(volume, occupancy)
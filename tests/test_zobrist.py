@@ -0,0 +1,38 @@
+"""增量 Zobrist 哈希的测试"""
+import pytest
+
+from core.autoplay import PlacementBot
+from core.game_state import GameState, create_board
+from core.zobrist import cell_key, combine_layers
+
+
+def recompute(board):
+    """按格子从头计算棋盘哈希"""
+    layers = [0] * max(board.max_height, 1)
+    for (x, y, z), _ in board.items():
+        layers[y] ^= cell_key(x, z)
+    return combine_layers(layers)
+
+
+def play(backend, pieces=150):
+    """用自动玩家下一局，逐个方块返回 (棋盘哈希, 校验值)"""
+    state = GameState(4, 12, 4, seed=7, board=create_board(4, 4, 12, backend))
+    state.spawn()
+    bot = PlacementBot()
+    hashes = []
+    while not state.game_over and state.pieces_placed < pieces:
+        assert state.place(*bot.choose(state))
+        board = state.board
+        assert board.zobrist == combine_layers(board.layer_hashes) == recompute(board)
+        hashes.append((board.zobrist, state.checksum()))
+    assert state.lines_cleared > 0
+    return hashes
+
+
+def test_incremental_hash_matches_recompute_after_clears():
+    play('bitboard')
+
+
+def test_backends_hash_identically():
+    pytest.importorskip('numpy')
+    assert play('numpy') == play('bitboard')
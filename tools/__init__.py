@@ -0,0 +1 @@
+# 使tools目录成为Python包
@@ -0,0 +1,55 @@
+"""回放文件命令行
+
+无界面地以最快速度重放一局录制的游戏，检查每个落地校验点和最终状态是否与录制时一致：
+
+    python -m tools.replay data/replays/20250403_144241.t3dr
+
+需要在画面中观看时使用 python main.py --replay <文件>。回放与录制不一致时以非零状态退出，
+并给出第一个不一致的落地校验点所在的逻辑帧。
+"""
+import argparse
+import sys
+import time
+
+from core import replay
+
+
+def main():
+    parser = argparse.ArgumentParser(description="重放并校验录制的游戏")
+    parser.add_argument('files', nargs='+', help="回放文件（.t3dr）")
+    args = parser.parse_args()
+
+    failed = 0
+    for path in args.files:
+        try:
+            data = replay.load(path)
+        except ValueError as e:
+            failed += 1
+            print(f"{path}: {e}")
+            continue
+        start = time.perf_counter()
+        player = replay.ReplayPlayer(data)
+        state = player.run()
+        elapsed = time.perf_counter() - start
+        ok, divergence = player.verify()
+
+        game_seconds = state.tick_count / data.tick_rate
+        speed = game_seconds / elapsed if elapsed > 0 else float('inf')
+        print(f"{path}: {data.width}×{data.depth}×{data.height}, 种子 {data.seed} ({data.policy}), "
+              f"{len(data.records)} 条记录")
+        print(f"  {state.tick_count} 帧 ({game_seconds:.1f} 秒), {state.pieces_placed} 个方块, "
+              f"{state.lines_cleared} 层消除, 分数 {state.score}"
+              f"{', 游戏结束' if state.game_over else ''}")
+        print(f"  回放用时 {elapsed * 1000:.1f} ms，{speed:.0f} 倍速")
+        if ok:
+            print("  校验通过")
+        else:
+            failed += 1
+            print(f"  校验失败：第 {divergence} 帧的落地状态与录制时不同")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
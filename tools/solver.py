@@ -0,0 +1,86 @@
+"""全消与谜题求解命令行
+
+给定方块序列（和可选的初始棋盘），搜索全消或最多消层的落点序列，
+结果可以作为谜题内容或回归测试数据：
+
+    python -m tools.solver --sequence TIJLOSZTIJ --height 8 --mode perfect
+    python -m tools.solver --random 10 --seed 3 --mode lines --workers 8 --output puzzle.json
+
+初始棋盘文件是一个JSON数组，每项为一个已占用格子的 [x, y, z]。
+"""
+import argparse
+import json
+import time
+
+from config.rules import GRID_WIDTH, GRID_DEPTH, PIECE_POLICY, shapes
+from core.bitboard import LayerOccupancy
+from core.piece_source import POLICIES, PieceSource
+from core.solver import MODES, solve
+
+
+def load_board(path, width, depth):
+    """读取初始棋盘，格子记为形状 'O'（求解只关心是否被占用）"""
+    board = LayerOccupancy(width, depth)
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            for x, y, z in json.load(f):
+                board[(x, y, z)] = 'O'
+    return board
+
+
+def main():
+    parser = argparse.ArgumentParser(description="全消与谜题求解")
+    parser.add_argument('--sequence', help="方块序列，例如 TIJLOSZ")
+    parser.add_argument('--random', type=int, help="随机生成这么长的方块序列")
+    parser.add_argument('--seed', type=int, default=0, help="随机序列的种子")
+    parser.add_argument('--policy', choices=POLICIES, default=PIECE_POLICY,
+                        help="随机序列的出块方式，与游戏中相同种子的序列一致")
+    parser.add_argument('--board', help="初始棋盘（JSON文件），默认为空棋盘")
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--depth', type=int, default=GRID_DEPTH)
+    parser.add_argument('--height', type=int, default=8, help="允许堆叠的最高层数")
+    parser.add_argument('--mode', choices=MODES, default='perfect')
+    parser.add_argument('--workers', type=int, default=1,
+                        help="进程数，0表示使用全部CPU；只在多核机器上的大搜索中更快，默认单进程")
+    parser.add_argument('--output', help="把结果写入JSON文件")
+    args = parser.parse_args()
+
+    if args.sequence:
+        sequence = list(args.sequence.upper())
+    elif args.random:
+        sequence = PieceSource(args.seed, args.policy).take(args.random)
+    else:
+        parser.error("需要指定 --sequence 或 --random")
+    unknown = [key for key in sequence if key not in shapes]
+    if unknown:
+        parser.error(f"未知的方块形状: {''.join(unknown)}")
+
+    board = load_board(args.board, args.width, args.depth)
+    start = time.perf_counter()
+    result = solve(board, sequence, args.height, args.mode, workers=args.workers or None)
+    elapsed = time.perf_counter() - start
+
+    print(f"序列: {''.join(sequence)}, 模式: {args.mode}, 用时 {elapsed:.2f} 秒, 搜索 {result['nodes']} 个节点")
+    if result['placements'] is None:
+        print("没有找到全消的解")
+    else:
+        print(f"消除 {result['lines']} 层{'（全消）' if result['perfect'] else ''}，落点 (形状, 朝向, x, z):")
+        for placement in result['placements']:
+            print(f"  {placement}")
+
+    if args.output:
+        result.update({
+            'sequence': sequence,
+            'width': args.width,
+            'depth': args.depth,
+            'height': args.height,
+            'mode': args.mode,
+            'board': [list(cell) for cell in board],
+        })
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""自动玩家锦标赛
+
+用进程池并行进行大量无界面对局，每局使用固定种子，比较不同自动玩家的表现：
+
+    python -m tools.tournament --agent random --agent lowest --games 1000 --output results.jsonl
+
+每局结束后立即把结果追加写入 JSONL 文件（按完成顺序，不等待更早提交的对局），
+程序中途崩溃也不会丢失已完成的对局；加上 --resume 会先截掉崩溃时写了一半的最后
+一行，再跳过文件中玩家、种子和全部对局设置（网格尺寸、出块方式、方块数上限）都相同
+的对局。每局同时记录墙钟时间 seconds 和CPU时间 cpu_seconds。最后按玩家汇总平均分、
+95%置信区间和吞吐量。
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config.rules import GRID_WIDTH, GRID_HEIGHT, GRID_DEPTH, PIECE_POLICY
+from core.agents import AGENTS, create_agent
+from core.piece_source import POLICIES
+from core.game_state import GameState
+
+# 一局对局的全部设置，既是子进程的任务参数，也是 --resume 判断对局是否已完成的键
+TASK_FIELDS = ('agent', 'seed', 'width', 'height', 'depth', 'max_pieces', 'policy')
+
+
+def play_game(task):
+    """进行一局游戏（在子进程中运行）
+
+    Args:
+        task: 按 TASK_FIELDS 顺序的元组
+
+    Returns:
+        dict: 对局结果，包含全部任务设置
+    """
+    agent_name, seed, width, height, depth, max_pieces, policy = task
+    # 机器过载时墙钟时间会把等待调度的时间也算进去，CPU时间只统计本进程
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    state = GameState(width, height, depth, seed=seed, policy=policy)
+    agent = create_agent(agent_name, seed)
+    state.spawn()
+    while not state.game_over and state.pieces_placed < max_pieces:
+        placement = agent.choose(state)
+        if placement is None or not state.place(*placement):
+            break
+    result = dict(zip(TASK_FIELDS, task))
+    result.update({
+        'score': state.score,
+        'lines': state.lines_cleared,
+        'pieces': state.pieces_placed,
+        'game_over': state.game_over,
+        'seconds': time.perf_counter() - start,
+        'cpu_seconds': time.process_time() - cpu_start,
+    })
+    return result
+
+
+def task_key(result):
+    """对局结果对应的任务元组，缺少设置字段（旧格式）时返回None"""
+    try:
+        return tuple(result[field] for field in TASK_FIELDS)
+    except KeyError:
+        return None
+
+
+def truncate_partial_line(path):
+    """截掉文件末尾没有换行结束的半行，之后追加的结果从新的一行开始"""
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def load_finished(path):
+    """读取已完成的对局 {任务元组: result}，忽略崩溃时写了一半的最后一行和旧格式的结果"""
+    finished = {}
+    if not os.path.exists(path):
+        return finished
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            key = task_key(result)
+            if key is not None:
+                finished[key] = result
+    return finished
+
+
+def confidence_interval(values, z=1.96):
+    """均值及其95%置信区间的半宽"""
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, 0.0
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    return mean, z * math.sqrt(variance / n)
+
+
+def summarize(results, played, wall_time):
+    """按玩家打印汇总统计
+
+    Args:
+        results: 参与统计的全部对局，包括 --resume 读入的
+        played: 本次运行完成的对局，用于计算吞吐量
+        wall_time: 本次运行的墙钟时间
+    """
+    by_agent = {}
+    for result in results:
+        by_agent.setdefault(result['agent'], []).append(result)
+
+    for agent, games in by_agent.items():
+        score, score_ci = confidence_interval([g['score'] for g in games])
+        lines, lines_ci = confidence_interval([g['lines'] for g in games])
+        pieces, pieces_ci = confidence_interval([g['pieces'] for g in games])
+        print(f"[{agent}] {len(games)} 局")
+        print(f"  分数: {score:.1f} ± {score_ci:.1f}")
+        print(f"  消层: {lines:.2f} ± {lines_ci:.2f}")
+        print(f"  方块: {pieces:.1f} ± {pieces_ci:.1f}")
+
+    total_pieces = sum(r['pieces'] for r in played)
+    cpu_time = sum(r['cpu_seconds'] for r in played)
+    if played and wall_time > 0:
+        game_time = sum(r['seconds'] for r in played)
+        print(f"用时 {wall_time:.2f} 秒, 局/秒: {len(played) / wall_time:.1f}, "
+              f"方块/秒: {total_pieces / wall_time:.0f}, 并行效率: {cpu_time / wall_time:.2f} 核")
+        print(f"每局平均 {game_time / len(played):.3f} 秒, CPU {cpu_time / len(played):.3f} 秒")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自动玩家锦标赛")
+    parser.add_argument('--agent', action='append', choices=sorted(AGENTS),
+                        help="参赛的自动玩家，可重复指定，默认全部")
+    parser.add_argument('--games', type=int, default=100, help="每个玩家的对局数")
+    parser.add_argument('--seed', type=int, default=0, help="第一局的种子，之后依次加1")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="进程数")
+    parser.add_argument('--width', type=int, default=GRID_WIDTH)
+    parser.add_argument('--height', type=int, default=GRID_HEIGHT)
+    parser.add_argument('--depth', type=int, default=GRID_DEPTH)
+    parser.add_argument('--policy', choices=POLICIES, default=PIECE_POLICY, help="出块方式")
+    parser.add_argument('--max-pieces', type=int, default=10000, help="每局最多放置的方块数")
+    parser.add_argument('--output', default='tournament.jsonl', help="结果文件（JSONL）")
+    parser.add_argument('--resume', action='store_true', help="跳过结果文件中已完成的对局")
+    args = parser.parse_args()
+
+    agents = args.agent or sorted(AGENTS)
+    finished = {}
+    if args.resume:
+        truncate_partial_line(args.output)
+        finished = load_finished(args.output)
+    wanted = [(agent, args.seed + i, args.width, args.height, args.depth, args.max_pieces, args.policy)
+              for agent in agents
+              for i in range(args.games)]
+    tasks = [task for task in wanted if task not in finished]
+    results = [finished[task] for task in wanted if task in finished]
+
+    # 每局单独提交，哪局先完成就先写入，不必等待更早提交但更慢的对局
+    played = []
+    mode = 'a' if args.resume else 'w'
+    start = time.perf_counter()
+    with open(args.output, mode, encoding='utf-8') as out, \
+            ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(play_game, task) for task in tasks]
+        for future in as_completed(futures):
+            result = future.result()
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+            played.append(result)
+    wall_time = time.perf_counter() - start
+
+    print(f"完成 {len(tasks)} 局，结果已写入 {args.output}")
+    results += played
+    if results:
+        summarize(results, played, wall_time)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+from ursina import *
+from PIL import Image
+
+class TopViewMinimap:
+    """俯视图小地图：每列对应纹理中的一个像素，整张图作为一张纹理贴在俯视图面板上
+
+    无论棋盘多大都只有一个四边形和一次绘制调用。每次重绘只写入颜色有变化的像素，
+    方块移动时只有它经过的几列需要更新。
+    """
+    def __init__(self, panel, width, depth, stack_height):
+        self.width = width
+        self.depth = depth
+        self.stack_height = stack_height
+        self.background = color.black66
+
+        self.texture = Texture(Image.new('RGBA', (width, depth), (0, 0, 0, 0)))
+        self.texture.filtering = None  # 最近邻采样，保持每列一个清晰的色块
+
+        # 直接使用已有的俯视图面板，面板颜色改为白色，由纹理决定底色
+        panel.texture = self.texture
+        panel.color = color.white
+        self.panel = panel
+        self.pixels = {}  # 已写入纹理的像素颜色 {(x, z): (r, g, b, a)}
+        self.shades = {}  # 按高度调整后的颜色缓存 {(id(颜色), y): (Color, (r, g, b, a))}
+
+    def shade(self, block_color, y):
+        """按高度调整颜色亮度，越高越亮"""
+        brightness = 0.4 + 0.6 * min((y + 1) / self.stack_height, 1)
+        return Color(block_color.r * brightness, block_color.g * brightness, block_color.b * brightness, 1)
+
+    def draw(self, top_blocks, active_columns=(), active_color=None):
+        """重新绘制小地图
+
+        Args:
+            top_blocks: 每列最高方块 {(x, z): (y, color)}
+            active_columns: 当前活动方块覆盖的列
+            active_color: 活动方块的颜色
+        """
+        pixels = self.pixels
+        shades = self.shades
+        active = (active_color, tuple(active_color) if active_color is not None else None)
+        background = (self.background, tuple(self.background))
+        changed = False
+        for x in range(self.width):
+            for z in range(self.depth):
+                if (x, z) in active_columns:
+                    pixel, value = active
+                elif (x, z) in top_blocks:
+                    # 落地方块的颜色来自固定的调色板，可以按对象和高度缓存
+                    y, block_color = top_blocks[(x, z)]
+                    key = (id(block_color), y)
+                    if key not in shades:
+                        shaded = self.shade(block_color, y)
+                        shades[key] = (shaded, tuple(shaded))
+                    pixel, value = shades[key]
+                else:
+                    pixel, value = background
+                if pixels.get((x, z)) != value:
+                    pixels[(x, z)] = value
+                    self.texture.set_pixel(x, z, pixel)
+                    changed = True
+        if changed:
+            self.texture.apply()
@@ -0,0 +1,98 @@
+from ursina import *
+from util import profiler
+
+# 浮层文字的刷新间隔（秒），百分位数不需要每帧重新计算
+REFRESH_INTERVAL = 0.25
+
+# 浮层中各阶段的显示顺序，没有出现过的阶段不显示
+PHASE_ORDER = ['update_game', 'tick', 'land', 'check_lines', 'spawn', 'events', 'ghost',
+               'cleared_layers', 'spawn_tetromino', 'update_next_preview', 'mesh_rebuild', 'views']
+
+
+class ProfilerOverlay(Entity):
+    """左上角显示帧时间、实体数和各阶段耗时百分位数的浮层"""
+
+    def __init__(self):
+        super().__init__(parent=camera.ui)
+        self.text = Text(
+            text='',
+            parent=camera.ui,
+            position=(-0.86, 0.47),
+            origin=(-0.5, 0.5),
+            scale=0.8,
+            font='VeraMono.ttf',  # 等宽字体，各列对齐
+            color=color.white,
+            background=True,
+        )
+        self.timer = 0
+        self.set_visible(False)
+
+    def set_visible(self, visible):
+        self.enabled = visible
+        self.text.enabled = visible
+        if visible:
+            self.refresh()
+
+    def update(self):
+        self.timer += time.dt
+        if self.timer >= REFRESH_INTERVAL:
+            self.timer = 0
+            self.refresh()
+
+    def refresh(self):
+        stats = profiler.summary()
+        p50, p95, p99, frames = stats.pop('frame')
+        fps = 1000 / p50 if p50 else 0
+        lines = [
+            f'frame  {p50:6.2f} ms  ({fps:.0f} fps)',
+            f'entities {len(scene.entities)}',
+            f'{"phase":<15}{"p50":>7}{"p95":>7}{"p99":>7}',
+        ]
+        phases = [phase for phase in PHASE_ORDER if phase in stats]
+        phases += sorted(phase for phase in stats if phase not in PHASE_ORDER)
+        for phase in phases:
+            p50, p95, p99, _ = stats[phase]
+            lines.append(f'{phase:<15}{p50:7.2f}{p95:7.2f}{p99:7.2f}')
+        if profiler.tracer is not None:
+            lines.append(f'tracing -> {profiler.tracer.path}')
+        lines.append('F3: close  F4: dump CSV  F5: trace')
+        self.text.text = '\n'.join(lines)
+
+
+overlay = None
+
+def setup_profiler_overlay():
+    """创建性能分析浮层，默认隐藏"""
+    global overlay
+    overlay = ProfilerOverlay()
+    return overlay
+
+def toggle_profiler():
+    """开启或关闭性能分析和浮层"""
+    on = profiler.toggle()
+    if overlay:
+        overlay.set_visible(on)
+    print(f"性能分析: {'开启' if on else '关闭'}")
+
+def dump_profile():
+    """把最近的帧记录导出为 CSV 文件"""
+    import os
+    from util.history_manager import GAME_DIR
+    path = os.path.join(GAME_DIR, 'data', time.strftime('profile_%Y%m%d_%H%M%S.csv'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    count = profiler.dump_csv(path)
+    print(f"已导出 {count} 帧性能数据到 {path}")
+
+def toggle_trace():
+    """开始或结束 trace-event 时间线记录，文件可在 Perfetto 中打开"""
+    import os
+    from util.history_manager import GAME_DIR
+    if profiler.tracer is not None:
+        path = profiler.tracer.path
+        count = profiler.stop_trace()
+        print(f"时间线记录结束: {count} 个事件已写入 {path}")
+        return
+    path = os.path.join(GAME_DIR, 'data', time.strftime('trace_%Y%m%d_%H%M%S.json'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiler.start_trace(path)
+    print(f"时间线记录开始: {path}")
@@ -1,6 +1,10 @@
 from ursina import *
 from util.score_manager import register_score_changed_callback, get_high_score, get_current_score, add_score
 from config.config import GRID_WIDTH, GRID_DEPTH
+from util import profiler
+
+# 俯视图画网格线的最大网格尺寸
+MINIMAP_GRID_LINE_LIMIT = 32
 
 # UI相关全局变量
 score_text = None
@@ -8,6 +12,13 @@ help_text = None
 orientation_indicator = None
 next_preview = None
 high_score_text = None
+top_panel = None
+
+# 预先构建的预览模型：下一个方块面板每种形状一个，姿态图每种形状的每个朝向一个
+next_preview_models = {}
+orientation_models = {}
+shown_next_model = None
+shown_orientation_model = None
 
 def score_changed_callback(current_score, high_score):
     """分数变化时的回调函数"""
@@ -96,7 +107,7 @@ def show_game_over_ui():
     print('Game Over!')
 
 def create_ui():
-    global score_text, help_text, high_score_text
+    global score_text, help_text, high_score_text, top_panel
     
     from util.utils import create_text
     from util.score_manager import get_high_score, get_current_score, register_score_changed_callback
@@ -138,33 +149,18 @@ def create_ui():
         z=-0.1
     )
     
-    # 重新设计俯视图网格 - 让网格更精确地对应实际游戏网格
-    cell_width = 0.35 / GRID_WIDTH
-    cell_depth = 0.35 / GRID_DEPTH
-    
-    # 添加网格线 - 垂直线(X方向)
-    for i in range(1,GRID_WIDTH):
-        x_pos = -0.175 + (i * cell_width)
-        Entity(
-            parent=top_panel,
-            model='quad',
-            color=color.gray,
-            scale=(0.003, 1),
-            position=(x_pos*2.8, 0, -0.01),
-            alpha=1
-        )
-    
-    # 添加网格线 - 水平线(Z方向)
-    for i in range(1,GRID_DEPTH):
-        z_pos = -0.175 + (i * cell_depth)
-        Entity(
-            parent=top_panel,
-            model='quad',
-            color=color.gray,
-            scale=(1, 0.003),
-            position=(0, z_pos*2.8, -0.01),
-            alpha=1
-        )
+    # 俯视图网格线合并成一个线段网格，坐标为面板的局部坐标（-0.5到0.5）
+    # 格子太小时网格线会盖住方块颜色，不再绘制
+    if max(GRID_WIDTH, GRID_DEPTH) <= MINIMAP_GRID_LINE_LIMIT:
+        vertices = []
+        for i in range(1, GRID_WIDTH):
+            x = -0.5 + i / GRID_WIDTH
+            vertices += [(x, -0.5, -0.01), (x, 0.5, -0.01)]
+        for i in range(1, GRID_DEPTH):
+            z = -0.5 + i / GRID_DEPTH
+            vertices += [(-0.5, z, -0.01), (0.5, z, -0.01)]
+        if vertices:
+            Entity(parent=top_panel, model=Mesh(vertices=vertices, mode='line'), color=color.gray)
     
 
     # 添加俯视图标题
@@ -235,37 +231,58 @@ def setup_next_preview():
         intensity=1.5
     )
     
+    # 启动时为每种形状构建一次预览模型，之后只切换显示哪一个
+    from config.config import shapes, shape_colors
+    for shape_key, shape in shapes.items():
+        next_preview_models[shape_key] = build_preview_model(
+            preview_container, shape[0], shape_colors[shape_key], block_size=0.15, block_scale=0.9)
+    
     next_preview = preview_container
     return next_preview
 
+def build_preview_model(parent, offsets, block_color, block_size, block_scale):
+    """用若干小方块拼出一个预览模型并合并成单个节点，初始为隐藏状态"""
+    model = Entity(parent=parent)
+    for pos in offsets:
+        Entity(
+            parent=model,
+            model='cube',
+            color=block_color,
+            position=(pos[0]*block_size, pos[1]*block_size, pos[2]*block_size),
+            scale=(block_size*block_scale, block_size*block_scale, block_size*block_scale)
+        )
+    # 合并子方块的网格，颜色保留为顶点色
+    model.combine()
+    model.texture = 'white_cube'
+    model.enabled = False
+    return model
+
+@profiler.timed('update_next_preview')
 def update_next_preview(next_shape_key, next_preview):
-    """更新下一个方块预览"""
-    from config.config import shapes, shape_colors
+    """更新下一个方块预览，只切换显示的模型"""
+    global shown_next_model
     
     if not next_shape_key:
         return
-        
-    # 清除旧的预览方块
-    if next_preview:
-        for child in next_preview.children:
-            destroy(child)
-    
-    # 获取下一个方块的形状和颜色
-    shape_positions = shapes[next_shape_key][0]
-    block_color = shape_colors[next_shape_key]
     
-    # 创建新的预览方块
-    block_size = 0.15  # 适当调整大小以适应预览面板
+    if shown_next_model:
+        shown_next_model.enabled = False
+    shown_next_model = next_preview_models.get(next_shape_key)
+    if shown_next_model:
+        shown_next_model.enabled = True
+
+def update_orientation_view(shape_key, orientation):
+    """切换姿态图显示的模型，使其与当前方块的形状和朝向一致"""
+    global shown_orientation_model
     
-    for pos in shape_positions:
-        block = Entity(
-            parent=next_preview,
-            model='cube',
-            texture='white_cube',
-            color=block_color,
-            position=(pos[0]*block_size, pos[1]*block_size, pos[2]*block_size),
-            scale=(block_size*0.9, block_size*0.9, block_size*0.9)
-        )
+    model = orientation_models.get((shape_key, orientation))
+    if model is shown_orientation_model:
+        return
+    if shown_orientation_model:
+        shown_orientation_model.enabled = False
+    shown_orientation_model = model
+    if model:
+        model.enabled = True
 
 def setup_orientation_view():
     """创建立体姿态图，展示当前方块的空间朝向"""
@@ -308,5 +325,13 @@ def setup_orientation_view():
         alpha=0.2
     )
     
+    # 启动时为每种形状的每个朝向构建一次模型，朝向直接来自方块的整数朝向表
+    from config.config import shape_colors
+    from core.rotation_table import ORIENTATIONS
+    for shape_key, orientations in ORIENTATIONS.items():
+        for orientation, offsets in enumerate(orientations):
+            orientation_models[(shape_key, orientation)] = build_preview_model(
+                indicator, offsets, shape_colors[shape_key], block_size=0.2, block_scale=0.8)
+    
     orientation_indicator = indicator
     return orientation_indicator
@@ -0,0 +1,281 @@
+"""逐帧分阶段计时的性能分析器
+
+在热点函数外面加上计时钩子，每次调用的耗时写入该阶段固定大小的环形缓冲区，
+用于计算 p50/p95/p99；每帧各阶段的合计耗时、帧时间和实体数另存一个环形缓冲区，
+可以导出为 CSV。不依赖ursina，界面上的显示见 ui.profiler_overlay。
+
+同一组钩子也可以把开始/结束事件写入 util.trace.TraceWriter（见 start_trace），
+生成可以在 Perfetto 中查看的时间线。
+
+    @profiler.timed('views')
+    def update_views(): ...
+
+    start = profiler.begin('tick')
+    ...
+    profiler.end('tick', start)
+
+关闭时钩子只多一次全局变量判断，几乎没有开销；缓冲区在创建时一次分配好，
+开启后记录过程中也不会增长。
+"""
+import atexit
+import csv
+import functools
+import math
+import time
+from array import array
+
+# 每个阶段保留的最近调用次数
+CALL_BUFFER_SIZE = 1024
+
+# 保留的最近帧数
+FRAME_BUFFER_SIZE = 600
+
+# 钩子是否生效：正在记录百分位数或正在写入时间线时为True
+enabled = False
+
+# 是否记录到环形缓冲区，由 enable()/toggle() 修改
+recording = False
+
+# 正在写入的时间线，由 start_trace()/stop_trace() 修改
+tracer = None
+
+
+class RingBuffer:
+    """固定大小的浮点数环形缓冲区，写满后覆盖最旧的数据"""
+
+    def __init__(self, size):
+        self.data = array('d', bytes(8 * size))
+        self.size = size
+        self.index = 0
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.index] = value
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def values(self):
+        """按写入顺序返回缓冲区中的数据"""
+        if self.count < self.size:
+            return list(self.data[:self.count])
+        return list(self.data[self.index:]) + list(self.data[:self.index])
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+
+
+def percentiles(values, points=(50, 95, 99)):
+    """按最近秩法计算若干百分位数，values 为空时返回全0"""
+    if not values:
+        return tuple(0.0 for _ in points)
+    ordered = sorted(values)
+    n = len(ordered)
+    return tuple(ordered[min(n - 1, max(0, math.ceil(p / 100 * n) - 1))] for p in points)
+
+
+# 各阶段每次调用的耗时（毫秒）{阶段: RingBuffer}
+calls = {}
+
+# 每帧的记录：帧时间、实体数和各阶段在该帧的合计耗时
+frame_times = RingBuffer(FRAME_BUFFER_SIZE)
+frame_entities = RingBuffer(FRAME_BUFFER_SIZE)
+frame_phases = [None] * FRAME_BUFFER_SIZE
+
+# 当前帧各阶段的合计耗时 {阶段: 毫秒}
+_current = {}
+_last_frame = None
+
+
+def _buffer(phase):
+    buffer = calls.get(phase)
+    if buffer is None:
+        buffer = calls[phase] = RingBuffer(CALL_BUFFER_SIZE)
+    return buffer
+
+
+def _update_enabled():
+    global enabled, _last_frame
+    was_enabled = enabled
+    enabled = recording or tracer is not None
+    # 重新开始时不把关闭期间的时间算作一帧
+    if not (was_enabled and enabled):
+        _last_frame = None
+
+
+def enable(on=True):
+    """开启或关闭记录；重新开启时清空旧数据"""
+    global recording
+    if on and not recording:
+        reset()
+    recording = on
+    _update_enabled()
+
+
+def toggle():
+    """切换记录状态
+
+    Returns:
+        bool: 切换后是否开启
+    """
+    enable(not recording)
+    return recording
+
+
+def start_trace(path):
+    """开始把各阶段的开始/结束事件写入 trace-event 文件"""
+    global tracer
+    from util.trace import TraceWriter
+    stop_trace()
+    tracer = TraceWriter(path)
+    if _last_frame is not None:
+        tracer.begin('frame')  # 已经在记录百分位数时，当前帧从现在开始
+    _update_enabled()
+    return tracer
+
+
+def stop_trace():
+    """结束时间线记录
+
+    Returns:
+        int: 写入的事件数，没有在记录时为0
+    """
+    global tracer
+    if tracer is None:
+        return 0
+    if _last_frame is not None:
+        tracer.end('frame')
+    count = tracer.close()
+    tracer = None
+    _update_enabled()
+    return count
+
+
+# 退出程序时写完缓冲区中剩余的事件
+atexit.register(stop_trace)
+
+
+def reset():
+    """清空所有缓冲区"""
+    for buffer in calls.values():
+        buffer.clear()
+    frame_times.clear()
+    frame_entities.clear()
+    _current.clear()
+
+
+def begin(phase=None):
+    """开始一段计时，关闭时返回None
+
+    Args:
+        phase: 阶段名，写入时间线时需要
+    """
+    if not enabled:
+        return None
+    if tracer is not None and phase is not None:
+        tracer.begin(phase)
+    return time.perf_counter()
+
+
+def end(phase, start, args=None):
+    """结束 begin() 开始的计时并记录到 phase
+
+    Args:
+        args: 写入时间线结束事件的参数，如消除的层数
+    """
+    if start is None:
+        return
+    if recording:
+        elapsed = (time.perf_counter() - start) * 1000
+        _buffer(phase).append(elapsed)
+        _current[phase] = _current.get(phase, 0.0) + elapsed
+    if tracer is not None:
+        tracer.end(phase, args)
+
+
+def timed(phase, trace_args=None):
+    """给函数加上计时钩子的装饰器
+
+    Args:
+        phase: 阶段名
+        trace_args: 由返回值计算时间线事件参数的函数，可选
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return func(*args, **kwargs)
+            start = begin(phase)
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                if trace_args and tracer is not None and result is not None:
+                    end(phase, start, trace_args(result))
+                else:
+                    end(phase, start)
+        return wrapper
+    return decorator
+
+
+def end_frame(entity_count=0):
+    """在每帧开始时调用，把上一帧的帧时间和各阶段合计写入帧缓冲区
+
+    Args:
+        entity_count: 当前场景中的实体数
+    """
+    global _current, _last_frame
+    if not enabled:
+        return
+    now = time.perf_counter()
+    if _last_frame is not None:
+        if recording:
+            frame_phases[frame_times.index] = _current
+            frame_times.append((now - _last_frame) * 1000)
+            frame_entities.append(entity_count)
+            _current = {}
+        if tracer is not None:
+            tracer.end('frame', {'entities': entity_count})
+    if tracer is not None:
+        tracer.counter('entities', {'entities': entity_count})
+        tracer.begin('frame')
+    _last_frame = now
+
+
+def summary():
+    """各阶段和整帧的百分位数
+
+    Returns:
+        dict: {阶段: (p50, p95, p99, 调用次数)}，单位毫秒，'frame' 为整帧时间
+    """
+    result = {'frame': percentiles(frame_times.values()) + (frame_times.count,)}
+    for phase, buffer in calls.items():
+        result[phase] = percentiles(buffer.values()) + (buffer.count,)
+    return result
+
+
+def frame_rows():
+    """按时间顺序返回帧记录 [(帧时间, 实体数, {阶段: 毫秒}), ...]"""
+    count = frame_times.count
+    start = (frame_times.index - count) % FRAME_BUFFER_SIZE
+    order = [(start + i) % FRAME_BUFFER_SIZE for i in range(count)]
+    return [(frame_times.data[i], int(frame_entities.data[i]), frame_phases[i]) for i in order]
+
+
+def dump_csv(path):
+    """把帧缓冲区导出为 CSV，每行一帧，各阶段一列
+
+    Returns:
+        int: 导出的帧数
+    """
+    rows = frame_rows()
+    phases = sorted(calls)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['frame', 'frame_ms', 'entities'] + [f'{phase}_ms' for phase in phases])
+        for i, (frame_ms, entities, phase_times) in enumerate(rows):
+            writer.writerow([i, f'{frame_ms:.3f}', entities]
+                            + [f'{phase_times.get(phase, 0.0):.3f}' for phase in phases])
+    return len(rows)
@@ -0,0 +1,112 @@
+"""Chrome trace-event 格式的事件记录
+
+把每帧各阶段和方块落地流程的开始/结束事件写成 trace-event JSON，可以直接在
+Perfetto（ui.perfetto.dev）或 chrome://tracing 中打开查看时间线：
+
+    writer = TraceWriter('trace.json')
+    writer.begin('land')
+    ...
+    writer.end('land', {'layers_cleared': 2})
+    writer.close()
+
+事件先放在内存中的小缓冲区里，攒满一块后整块追加写入文件，长时间记录时
+内存占用不会增长。文件使用 JSON 数组格式，程序中途退出没有写入结尾的 ']'
+时，两个查看器同样可以打开。
+"""
+import json
+import os
+import threading
+import time
+
+# 攒满这么多事件后写入一次文件
+CHUNK_EVENTS = 2000
+
+
+class TraceWriter:
+    """流式写入 trace-event JSON 文件"""
+
+    def __init__(self, path, chunk_events=CHUNK_EVENTS):
+        """
+        Args:
+            path: 输出文件路径
+            chunk_events: 每次写入文件的事件数
+        """
+        self.path = path
+        self.chunk_events = chunk_events
+        self.pid = os.getpid()
+        self.tid = threading.get_ident()
+        self.origin = time.perf_counter()
+        self.chunk = []
+        self.events_written = 0
+        self.file = open(path, 'w', encoding='utf-8')
+        self.file.write('[\n')
+        self._first = True
+        self.metadata('process_name', {'name': 'Tetris'})
+        self.metadata('thread_name', {'name': 'main'})
+
+    def _timestamp(self):
+        """距记录开始的微秒数"""
+        return (time.perf_counter() - self.origin) * 1e6
+
+    def _add(self, event):
+        self.chunk.append(json.dumps(event, ensure_ascii=False, separators=(',', ':')))
+        if len(self.chunk) >= self.chunk_events:
+            self.flush()
+
+    def _event(self, phase, name, args=None):
+        event = {'name': name, 'ph': phase, 'ts': self._timestamp(), 'pid': self.pid, 'tid': self.tid}
+        if args:
+            event['args'] = args
+        self._add(event)
+
+    def begin(self, name, args=None):
+        """一段时间的开始（B事件）"""
+        self._event('B', name, args)
+
+    def end(self, name, args=None):
+        """一段时间的结束（E事件），args 会与开始事件的参数合并显示"""
+        self._event('E', name, args)
+
+    def instant(self, name, args=None):
+        """没有持续时间的瞬时事件"""
+        event = {'name': name, 'ph': 'i', 's': 't', 'ts': self._timestamp(),
+                 'pid': self.pid, 'tid': self.tid}
+        if args:
+            event['args'] = args
+        self._add(event)
+
+    def counter(self, name, values):
+        """计数器事件，查看器中显示为随时间变化的曲线
+
+        Args:
+            values: {序列名: 数值}
+        """
+        self._add({'name': name, 'ph': 'C', 'ts': self._timestamp(), 'pid': self.pid, 'args': values})
+
+    def metadata(self, name, args):
+        self._add({'name': name, 'ph': 'M', 'pid': self.pid, 'tid': self.tid, 'args': args})
+
+    def flush(self):
+        """把缓冲区中的事件写入文件"""
+        if not self.chunk or self.file is None:
+            return
+        prefix = '' if self._first else ',\n'
+        self.file.write(prefix + ',\n'.join(self.chunk))
+        self.file.flush()
+        self._first = False
+        self.events_written += len(self.chunk)
+        self.chunk = []
+
+    def close(self):
+        """写入剩余事件并结束文件
+
+        Returns:
+            int: 写入的事件总数
+        """
+        if self.file is None:
+            return self.events_written
+        self.flush()
+        self.file.write('\n]\n')
+        self.file.close()
+        self.file = None
+        return self.events_written
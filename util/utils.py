@@ -35,19 +35,20 @@ def create_text(text, position, scale=1, color=color.white):
 
 # 添加调试功能
 def debug_grid():
-    """在控制台显示当前网格状态"""
-    from config.config import GRID_WIDTH, GRID_HEIGHT, GRID_DEPTH
+    """在控制台显示当前网格状态（按x方向的侧视图，只显示堆叠高度以内的层）
+
+    由每列的位掩码按x合并得到，不逐格查询，大网格也只需 O(宽×深) 次运算。
+    """
+    from config.config import GRID_WIDTH, GRID_DEPTH
     from core.game_grid import grid_positions
     
-    print("\n当前网格状态:")
-    for y in range(GRID_HEIGHT-1, -1, -1):
-        row = []
+    columns = grid_positions.column_masks()
+    rows = [0] * GRID_WIDTH
+    for z in range(GRID_DEPTH):
         for x in range(GRID_WIDTH):
-            has_block = False
-            for z in range(GRID_DEPTH):
-                if (x, y, z) in grid_positions:
-                    has_block = True
-                    break
-            row.append('■' if has_block else '□')
-        print(''.join(row))
+            rows[x] |= columns[x + z * GRID_WIDTH]
+    
+    print("\n当前网格状态:")
+    for y in range(grid_positions.max_height - 1, -1, -1):
+        print(''.join('■' if rows[x] >> y & 1 else '□' for x in range(GRID_WIDTH)))
     print("\n")